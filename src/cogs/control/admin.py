@@ -1,13 +1,13 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.database import fetch_server_details, server_autocomplete
+from utils.database import server_autocomplete
+from utils.serverregistry import server_registry
 from utils.bans import (
     fetch_bans,
     log_ban,
     clear_bans
 )
-from palworld_api import PalworldAPI
 import logging
 import io
 
@@ -16,15 +16,9 @@ class AdminCog(commands.Cog):
         self.bot = bot
 
     async def get_api_instance(self, guild_id, server_name):
-        server_config = await fetch_server_details(guild_id, server_name)
-        if not server_config:
+        api = await server_registry.get_api(guild_id, server_name)
+        if not api:
             return None, f"Server '{server_name}' configuration not found."
-        
-        host = server_config[2]
-        password = server_config[3]
-        api_port = server_config[4]
-        
-        api = PalworldAPI(f"http://{host}:{api_port}", password)
         return api, None
 
     async def server_autocomplete(self, interaction: discord.Interaction, current: str):
@@ -0,0 +1,122 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from fnmatch import fnmatchcase
+from utils.fanout import fan_out
+from utils.pagination import Pagination, PaginationView
+from utils.rconutility import RconUtility
+from utils.serverregistry import server_registry
+import logging
+
+FIELD_LIMIT = 1024
+EMBED_LIMIT = 6000
+PAGE_SIZE = 10
+
+class FleetCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.rcon = RconUtility()
+        self.concurrency = 8
+        self.timeout = 60
+
+    fleet_group = app_commands.Group(name="fleet", description="Run a command on many servers at once", default_permissions=discord.Permissions(administrator=True), guild_only=True)
+
+    async def target_autocomplete(self, interaction: discord.Interaction, current: str):
+        names = ["all"] + [s.server_name for s in await server_registry.for_guild(interaction.guild.id)]
+        return [app_commands.Choice(name=name, value=name) for name in names if current.lower() in name.lower()][:25]
+
+    async def select_servers(self, guild_id: int, target: str):
+        servers = await server_registry.for_guild(guild_id)
+        patterns = [p.strip().lower() for p in (target or "all").split(",") if p.strip()]
+        if not patterns or "all" in patterns:
+            return servers
+        # Comma-separated names or globs, so a naming scheme like "eu-*" works as a tag.
+        return [s for s in servers if any(fnmatchcase(s.server_name.lower(), p) for p in patterns)]
+
+    async def rest_call(self, server, call):
+        response = await call(server_registry.client(server))
+        if isinstance(response, dict) and "error" in response:
+            return False, response["error"]
+        return True, str(response or "OK")
+
+    async def rcon_call(self, server, command: str):
+        if not server.rcon_port:
+            return False, "No RCON port configured."
+        result = (await self.rcon.rcon_batch(server.host, server.rcon_port, server.password, [command]))[0]
+        return result.ok, result.response or "OK"
+
+    async def broadcast(self, interaction: discord.Interaction, title: str, target: str, operation):
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        servers = await self.select_servers(interaction.guild.id, target)
+        if not servers:
+            await interaction.followup.send(f"No servers match '{target}'.", ephemeral=True)
+            return
+        outcomes = await fan_out(
+            servers, operation, limit=self.concurrency, timeout=self.timeout,
+            label=lambda s: f"Fleet {title} on '{s.server_name}'"
+        )
+        results = []
+        for server, outcome in zip(servers, outcomes):
+            if isinstance(outcome, BaseException):
+                results.append((server.server_name, False, str(outcome) or type(outcome).__name__))
+            else:
+                results.append((server.server_name, *outcome))
+        results.sort(key=lambda r: (r[1], r[0]))
+        succeeded = sum(1 for r in results if r[1])
+        logging.info(f"Fleet {title} in guild {interaction.guild.id}: {succeeded}/{len(results)} succeeded")
+
+        def create_embed(page, current_page, total_pages):
+            embed = discord.Embed(
+                title=f"Fleet {title}",
+                description=f"{succeeded} of {len(results)} servers succeeded.",
+                color=discord.Color.green() if succeeded == len(results) else discord.Color.orange()
+            )
+            embed.set_footer(text=f"Page {current_page} of {total_pages}")
+            # Each field gets an equal share of the 6000 character embed budget.
+            budget = min(FIELD_LIMIT, (EMBED_LIMIT - len(embed.title) - len(embed.description) - len(embed.footer.text) - 100) // max(1, len(page)))
+            for name, ok, detail in page:
+                field_name = f"{'✅' if ok else '❌'} {name}"[:256]
+                room = budget - len(field_name) - 6
+                detail = detail.replace("`", "'")
+                if len(detail) > room:
+                    detail = detail[:max(0, room - 1)] + "…"
+                embed.add_field(name=field_name, value=f"```{detail}```" if detail else "OK", inline=False)
+            return embed
+
+        paginator = Pagination(results, page_size=PAGE_SIZE)
+        embed = create_embed(paginator.get_page(1), 1, paginator.total_pages)
+        view = PaginationView(paginator, 1, create_embed)
+        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+
+    @fleet_group.command(name="rcon", description="Send an RCON command to several servers.")
+    @app_commands.describe(command="RCON Command", target="'all', server names or patterns like 'eu-*', comma separated")
+    @app_commands.autocomplete(target=target_autocomplete)
+    async def fleet_rcon(self, interaction: discord.Interaction, command: str, target: str = "all"):
+        await self.broadcast(interaction, "RCON", target, lambda s: self.rcon_call(s, command))
+
+    @fleet_group.command(name="reloadcfg", description="Reload the PalDefender config on several servers.")
+    @app_commands.describe(target="'all', server names or patterns like 'eu-*', comma separated")
+    @app_commands.autocomplete(target=target_autocomplete)
+    async def fleet_reloadcfg(self, interaction: discord.Interaction, target: str = "all"):
+        await self.broadcast(interaction, "Reload Config", target, lambda s: self.rcon_call(s, "reloadcfg"))
+
+    @fleet_group.command(name="announce", description="Make an announcement on several servers.")
+    @app_commands.describe(message="The message to announce", target="'all', server names or patterns like 'eu-*', comma separated")
+    @app_commands.autocomplete(target=target_autocomplete)
+    async def fleet_announce(self, interaction: discord.Interaction, message: str, target: str = "all"):
+        await self.broadcast(interaction, "Announce", target, lambda s: self.rest_call(s, lambda api: api.make_announcement(message)))
+
+    @fleet_group.command(name="save", description="Save the state of several servers.")
+    @app_commands.describe(target="'all', server names or patterns like 'eu-*', comma separated")
+    @app_commands.autocomplete(target=target_autocomplete)
+    async def fleet_save(self, interaction: discord.Interaction, target: str = "all"):
+        await self.broadcast(interaction, "Save", target, lambda s: self.rest_call(s, lambda api: api.save_server_state()))
+
+    @fleet_group.command(name="shutdown", description="Shut down several servers.")
+    @app_commands.describe(message="The message to display before shutdown", seconds="The number of seconds before shutdown", target="'all', server names or patterns like 'eu-*', comma separated")
+    @app_commands.autocomplete(target=target_autocomplete)
+    async def fleet_shutdown(self, interaction: discord.Interaction, message: str, seconds: int, target: str = "all"):
+        await self.broadcast(interaction, "Shutdown", target, lambda s: self.rest_call(s, lambda api: api.shutdown_server(seconds, message)))
+
+async def setup(bot):
+    await bot.add_cog(FleetCog(bot))
@@ -1,9 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.database import server_autocomplete, fetch_server_details
-from palworld_api import PalworldAPI
+from utils.database import server_autocomplete
+from utils.serverregistry import server_registry
 from utils.apicache import api_cache
+from utils.circuitbreaker import circuit_breaker, server_key, CircuitOpenError
 import logging
 
 class ServerInfoCog(commands.Cog):
@@ -25,7 +26,7 @@ class ServerInfoCog(commands.Cog):
         await interaction.response.defer(thinking=True, ephemeral=True)
         try:
             guild_id = interaction.guild.id
-            server_config = await fetch_server_details(guild_id, server)
+            server_config = await server_registry.get(guild_id, server)
             if not server_config:
                 await interaction.followup.send(f"Server '{server}' configuration not found.", ephemeral=True)
                 return
@@ -34,7 +35,8 @@ class ServerInfoCog(commands.Cog):
             password = server_config[3]
             api_port = server_config[4]
             
-            server_info, server_metrics, _ = await api_cache.get_all_server_data(host, api_port, password)
+            snapshot = await api_cache.get_snapshot(host, api_port, password, endpoints=("info", "metrics"))
+            server_info, server_metrics = snapshot.server_info, snapshot.server_metrics
             
             embed = discord.Embed(title=f"{server_info.get('servername', server)}", description=f"{server_info.get('description', 'N/A')}", color=discord.Color.blurple())
             embed.add_field(name="Players", value=f"{server_metrics.get('currentplayernum', 'N/A')}/{server_metrics.get('maxplayernum', 'N/A')}", inline=True)
@@ -44,9 +46,13 @@ class ServerInfoCog(commands.Cog):
             embed.add_field(name="FPS", value=server_metrics.get('serverfps', 'N/A'), inline=True)
             embed.add_field(name="Latency", value=f"{server_metrics.get('serverframetime', 'N/A'):.2f} ms", inline=True)
             embed.add_field(name="WorldGUID", value=f"`{server_info.get('worldguid', 'N/A')}`", inline=False)
+            embed.add_field(name="Status", value=circuit_breaker.describe(server_key(host, api_port)), inline=False)
             embed.set_thumbnail(url="https://www.palbot.gg/images/rexavatar.png")
+            embed.set_footer(text=f"Updated {int(snapshot.age)}s ago")
             
             await interaction.followup.send(embed=embed)
+        except CircuitOpenError:
+            await interaction.followup.send(f"Server '{server}' is currently unreachable: {circuit_breaker.describe(server_key(host, api_port))}.", ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f"Error getting server info: {str(e)}", ephemeral=True)
             logging.error(f"Error getting server info: {str(e)}")
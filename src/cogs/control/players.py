@@ -1,8 +1,8 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.database import fetch_server_details, server_autocomplete
-from palworld_api import PalworldAPI
+from utils.database import server_autocomplete
+from utils.serverregistry import server_registry
 from utils.apicache import api_cache
 import logging
 
@@ -11,15 +11,9 @@ class PlayersCog(commands.Cog):
         self.bot = bot
 
     async def get_api_instance(self, guild_id, server_name):
-        server_config = await fetch_server_details(guild_id, server_name)
-        if not server_config:
+        api = await server_registry.get_api(guild_id, server_name)
+        if not api:
             return None, f"Server '{server_name}' configuration not found."
-        
-        host = server_config[2]
-        password = server_config[3]
-        api_port = server_config[4]
-        
-        api = PalworldAPI(f"http://{host}:{api_port}", password)
         return api, None
 
     async def server_autocomplete(self, interaction: discord.Interaction, current: str):
@@ -36,7 +30,7 @@ class PlayersCog(commands.Cog):
     async def player_list(self, interaction: discord.Interaction, server: str):
         await interaction.response.defer(thinking=True, ephemeral=True)
         try:
-            server_config = await fetch_server_details(interaction.guild.id, server)
+            server_config = await server_registry.get(interaction.guild.id, server)
             if not server_config:
                 await interaction.followup.send(f"Server '{server}' configuration not found.", ephemeral=True)
                 return
@@ -45,9 +39,11 @@ class PlayersCog(commands.Cog):
             password = server_config[3]
             api_port = server_config[4]
             
-            player_list = await api_cache.get_player_list(host, api_port, password)
+            snapshot = await api_cache.get_snapshot(host, api_port, password, endpoints=("players",))
+            player_list = snapshot.player_list
             if player_list and 'players' in player_list:
                 embed = self.playerlist_embed(server, player_list['players'])
+                embed.set_footer(text=f"Updated {int(snapshot.age)}s ago")
                 await interaction.followup.send(embed=embed, ephemeral=True)
             else:
                 await interaction.followup.send(f"No players found on server '{server}'.", ephemeral=True)
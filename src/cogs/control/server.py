@@ -12,7 +12,7 @@ from utils.database import (
     remove_logchannel
 )
 from utils.servermodal import AddServerModal
-from palworld_api import PalworldAPI
+from utils.apiclient import api_clients
 import logging
 
 class ServerManagementCog(commands.Cog):
@@ -35,7 +35,7 @@ class ServerManagementCog(commands.Cog):
             rcon_port = int(modal.children[4].value) if modal.children[4].value else None
 
             try:
-                api = PalworldAPI(f"http://{host}:{api_port}", password)
+                api = api_clients.client(host, api_port, password)
                 server_info = await api.get_server_info()
                 
                 if not server_info or 'version' not in server_info:
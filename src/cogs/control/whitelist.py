@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from utils.whitelist import (
     add_whitelist,
@@ -9,54 +9,46 @@ from utils.whitelist import (
     whitelist_get
 )
 from utils.database import (
-    fetch_all_servers,
     server_autocomplete,
     fetch_logchannel
 )
-from palworld_api import PalworldAPI
-from utils.apicache import api_cache
+from utils.serverregistry import server_registry
+from utils.poller import server_poller, ServerSnapshot
 import logging
 
 class WhitelistCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.check_whitelist.start()
+        server_poller.subscribe("whitelist", self.check_whitelist, interval=60)
 
     def cog_unload(self):
-        self.check_whitelist.cancel()
+        server_poller.unsubscribe("whitelist")
 
-    @tasks.loop(seconds=60)
-    async def check_whitelist(self):
-        servers = await fetch_all_servers()
-        for server in servers:
-            guild_id, server_name, host, password, api_port, rcon_port = server
-            if not await whitelist_get(guild_id, server_name):
-                continue
-            
-            log_channel_id = await fetch_logchannel(guild_id, server_name)
-            log_channel = self.bot.get_channel(log_channel_id) if log_channel_id else None
+    async def check_whitelist(self, snapshot: ServerSnapshot):
+        server = snapshot.server
+        guild_id, server_name = snapshot.key
+        if not await whitelist_get(guild_id, server_name):
+            return
+        
+        log_channel_id = await fetch_logchannel(guild_id, server_name)
+        log_channel = self.bot.get_channel(log_channel_id) if log_channel_id else None
 
-            try:
-                player_list = await api_cache.get_player_list(host, api_port, password)
-                api = PalworldAPI(f"http://{host}:{api_port}", password)
-                for player in player_list['players']:
-                    playerid = player['userId']
-                    if not await is_whitelisted(playerid):
-                        await api.kick_player(playerid, "You are not whitelisted.")
-                        logging.info(f"Player {playerid} kicked from server '{server_name}' for not being whitelisted.")
-                        
-                        if log_channel:
-                            kick_message = f"Player `{playerid}` was kicked from server {server_name} for not being whitelisted."
-                            embed = discord.Embed(title="Whitelist Check", description=kick_message, color=discord.Color.red(), timestamp=discord.utils.utcnow())
-                            await log_channel.send(embed=embed)
-
-                logging.info(f"Whitelist checked for server '{server_name}'.")
-            except Exception as e:
-                logging.error(f"An unexpected error occurred while checking whitelist for server '{server_name}': {str(e)}")
+        try:
+            api = server_registry.client(server)
+            for player in snapshot.players:
+                playerid = player['userId']
+                if not await is_whitelisted(playerid):
+                    await api.kick_player(playerid, "You are not whitelisted.")
+                    logging.info(f"Player {playerid} kicked from server '{server_name}' for not being whitelisted.")
+                    
+                    if log_channel:
+                        kick_message = f"Player `{playerid}` was kicked from server {server_name} for not being whitelisted."
+                        embed = discord.Embed(title="Whitelist Check", description=kick_message, color=discord.Color.red(), timestamp=discord.utils.utcnow())
+                        await log_channel.send(embed=embed)
 
-    @check_whitelist.before_loop
-    async def before_check_whitelist(self):
-        await self.bot.wait_until_ready()
+            logging.info(f"Whitelist checked for server '{server_name}'.")
+        except Exception as e:
+            logging.error(f"An unexpected error occurred while checking whitelist for server '{server_name}': {str(e)}")
 
     @app_commands.command(name="add", description="Add a player to the whitelist.")
     @app_commands.describe(playerid="The playerid of the player to whitelist.")
@@ -3,7 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 import yaml
 import os
-from src.utils.economy import get_gold
+from utils.economy import get_gold
 
 CONFIG_FILE = os.path.join("config", "sftp.yml")
 
@@ -3,11 +3,10 @@ from discord.ext import commands
 from discord import app_commands
 import yaml
 import os
-import asyncio
-from src.utils.economy import get_gold, remove_gold
-from src.utils.database import get_linked_player, fetch_server_details, server_autocomplete
-from utils.rconutility import RconUtility
-from palworld_api import PalworldAPI
+from utils.economy import get_gold
+from utils.database import get_linked_player, server_autocomplete
+from utils.serverregistry import server_registry
+from utils.delivery import purchase_delivery, delivery_worker
 
 CONFIG_FILE = os.path.join("config", "shop.yml")
 SFTP_CONFIG = os.path.join("config", "sftp.yml")
@@ -29,12 +28,11 @@ def load_economy_config():
 class ShopCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.rcon = RconUtility()
         self.shop_items = load_shop_config()
         self.economy_config = load_economy_config()
 
     async def get_server_info(self, guild_id: int, server_name: str):
-        details = await fetch_server_details(guild_id, server_name)
+        details = await server_registry.get(guild_id, server_name)
         if details:
             return {"host": details[2], "password": details[3], "api_port": details[4], "rcon_port": details[5]}
 
@@ -156,7 +154,7 @@ class ShopCog(commands.Cog):
             await interaction.followup.send(f"Server '{server}' not found.", ephemeral=True)
             return
         
-        api = PalworldAPI(f"http://{server_info['host']}:{server_info['api_port']}", server_info['password'])
+        api = await server_registry.get_api(interaction.guild.id, server)
         
         try:
             players_data = await api.get_player_list()
@@ -175,33 +173,22 @@ class ShopCog(commands.Cog):
             )
             return
         
-        success, new_balance = await remove_gold(interaction.user.id, interaction.guild.id, price)
+        items_to_give = shop_item.get("items", [])
+        success, new_balance, job_id = await purchase_delivery(
+            interaction.user.id,
+            interaction.guild.id,
+            price,
+            server,
+            shop_item.get("name"),
+            [f"giveitems {player_userid} {item_str}" for item_str in items_to_give]
+        )
         if not success:
             await interaction.followup.send(
                 f"Failed to deduct {currency}. You may not have enough.",
                 ephemeral=True
             )
             return
-        
-        items_to_give = shop_item.get("items", [])
-        
-        for item_str in items_to_give:
-            cmd = f"giveitems {player_userid} {item_str}"
-            try:
-                await self.rcon.rcon_command(
-                    server_info["host"],
-                    server_info["rcon_port"],
-                    server_info["password"],
-                    cmd
-                )
-                await asyncio.sleep(0.5)
-            except Exception as e:
-                await interaction.followup.send(
-                    f"Error giving items: {str(e)}\nYour {currency} has been refunded.",
-                    ephemeral=True
-                )
-                await remove_gold(interaction.user.id, interaction.guild.id, -price)
-                return
+        delivery_worker.watch(job_id, interaction)
         
         embed = discord.Embed(
             title="Purchase Successful",
@@ -212,7 +199,7 @@ class ShopCog(commands.Cog):
         embed.add_field(name="New Balance", value=f"{new_balance} {currency}", inline=True)
         embed.add_field(name="Server", value=server, inline=True)
         embed.add_field(
-            name="Items Received",
+            name="Items (delivering now)",
             value="\n".join([f"• {item}" for item in items_to_give]),
             inline=False
         )
@@ -5,7 +5,7 @@ import random
 import datetime
 import yaml
 import os
-from src.utils.economy import get_gold, add_gold, get_last_work, update_last_work
+from utils.economy import get_gold, add_gold, get_last_work, update_last_work
 
 CONFIG_FILE = os.path.join("config", "sftp.yml")
 
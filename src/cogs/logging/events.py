@@ -2,63 +2,100 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from utils.database import (
-    fetch_all_servers,
     add_logchannel,
     remove_logchannel,
     fetch_logchannel,
     server_autocomplete
 )
-from palworld_api import PalworldAPI
-from utils.apicache import api_cache
+from utils.poller import server_poller, ServerSnapshot
+from utils.sendqueue import send_queue
 import logging
 
+FIELD_LIMIT = 1024
+MAX_FIELDS = 25
+EMBED_LIMIT = 6000
+
 class EventsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.player_cache = {}
-        self.log_players.start()
+        self.pending = {}
+        server_poller.subscribe("events", self.log_players)
+        self.flush_events.start()
 
     def cog_unload(self):
-        self.log_players.cancel()
+        server_poller.unsubscribe("events")
+        self.flush_events.cancel()
+
+    async def log_players(self, snapshot: ServerSnapshot):
+        if not snapshot.joined and not snapshot.left:
+            return
+        guild_id, server_name = snapshot.key
+        log_channel_id = await fetch_logchannel(guild_id, server_name)
+        if log_channel_id:
+            events = self.pending.setdefault(log_channel_id, {}).setdefault(server_name, ([], []))
+            events[0].extend(snapshot.joined)
+            events[1].extend(snapshot.left)
 
-    @tasks.loop(seconds=20)
-    async def log_players(self):
-        servers = await fetch_all_servers()
-        for server in servers:
-            guild_id, server_name, host, password, api_port, rcon_port = server
-            log_channel_id = await fetch_logchannel(guild_id, server_name)
-            if log_channel_id:
-                channel = self.bot.get_channel(log_channel_id)
-                if channel:
-                    try:
-                        player_list = await api_cache.get_player_list(host, api_port, password)
-                        current_players = {(player['userId'], player['accountName']) for player in player_list['players']}
+    @tasks.loop(seconds=5)
+    async def flush_events(self):
+        pending, self.pending = self.pending, {}
+        for channel_id, servers in pending.items():
+            channel = self.bot.get_channel(channel_id)
+            if not channel:
+                continue
+            try:
+                send_queue.send(channel, label=f"log channel {channel_id}", embed=self.events_embed(servers))
+            except Exception as e:
+                logging.error(f"Issues logging players to channel {channel_id}: {str(e)}")
 
-                        if server_name not in self.player_cache:
-                            self.player_cache[server_name] = current_players
-                            continue
+    def events_embed(self, servers):
+        total_joined = sum(len(joined) for joined, _ in servers.values())
+        total_left = sum(len(left) for _, left in servers.values())
+        if total_joined + total_left == 1:
+            server_name, (joined, left) = next(iter(servers.items()))
+            if joined:
+                join_text = f"Player `{joined[0]['accountName']} ({joined[0]['userId']})` has joined {server_name}."
+                return discord.Embed(title="Player Joined", description=join_text, color=discord.Color.green(), timestamp=discord.utils.utcnow())
+            left_text = f"Player `{left[0]['accountName']} ({left[0]['userId']})` has left {server_name}."
+            return discord.Embed(title="Player Left", description=left_text, color=discord.Color.red(), timestamp=discord.utils.utcnow())
 
-                        old_players = self.player_cache[server_name]
-                        joined_players = current_players - old_players
-                        left_players = old_players - current_players
+        color = discord.Color.green() if not total_left else discord.Color.red() if not total_joined else discord.Color.blurple()
+        embed = discord.Embed(title="Player Activity", description=f"{total_joined} joined, {total_left} left.", color=color, timestamp=discord.utils.utcnow())
+        fields = []
+        for server_name, (joined, left) in servers.items():
+            if joined:
+                fields.append((f"Joined {server_name} ({len(joined)})", joined))
+            if left:
+                fields.append((f"Left {server_name} ({len(left)})", left))
 
-                        for userId, accountName in joined_players:
-                            join_text = f"Player `{accountName} ({userId})` has joined {server_name}."
-                            join = discord.Embed(title="Player Joined", description=join_text , color=discord.Color.green(), timestamp=discord.utils.utcnow())
-                            await channel.send(embed=join)
-                        for userId, accountName in left_players:
-                            left_text = f"Player `{accountName} ({userId})` has left {server_name}."
-                            left = discord.Embed(title="Player Left", description=left_text, color=discord.Color.red(), timestamp=discord.utils.utcnow())
-                            await channel.send(embed=left)
+        if len(fields) > MAX_FIELDS:
+            fields, overflow = fields[:MAX_FIELDS - 1], fields[MAX_FIELDS - 1:]
+            hidden = sum(len(players) for _, players in overflow)
+            fields.append((f"Other servers ({hidden})", []))
+        # Share the embed's total budget between fields so a burst never overflows it.
+        budget = min(FIELD_LIMIT, (EMBED_LIMIT - len(embed.title) - len(embed.description) - 200) // max(1, len(fields)))
+        for name, players in fields:
+            embed.add_field(name=name, value=self.player_lines(players, budget - len(name)), inline=False)
+        return embed
 
-                        self.player_cache[server_name] = current_players
-                    except Exception as e:
-                        logging.error(f"Issues logging player on '{server_name}': {str(e)}")
+    def player_lines(self, players, limit):
+        lines = []
+        used = 0
+        for index, player in enumerate(players):
+            line = f"`{player['accountName']} ({player['userId']})`"
+            remaining = len(players) - index
+            more = f"...and {remaining} more"
+            if used + len(line) + 1 > limit - (len(more) + 1 if remaining > 1 else 0):
+                lines.append(more)
+                break
+            lines.append(line)
+            used += len(line) + 1
+        return "\n".join(lines) if lines else "Too many to list."
 
-    @log_players.before_loop
-    async def before_log_players(self):
+    @flush_events.before_loop
+    async def before_flush_events(self):
         await self.bot.wait_until_ready()
-        
+
     async def server_names(self, interaction: discord.Interaction, current: str):
         guild_id = interaction.guild.id
         server_names = await server_autocomplete(guild_id, current)
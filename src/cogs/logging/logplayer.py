@@ -3,49 +3,50 @@ from discord.ext import commands, tasks
 from discord import app_commands
 import datetime
 from utils.database import (
-    add_player,
-    fetch_all_servers,
+    add_players,
     fetch_player,
     player_autocomplete,
     track_sessions,
     get_player_session
 )
 from utils.whitelist import is_whitelisted
-from palworld_api import PalworldAPI
-from utils.apicache import api_cache
+from utils.poller import server_poller, ServerSnapshot
+from utils.fanout import fan_out
 import logging
 
 class PlayerLoggingCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.pending = {}
+        server_poller.subscribe("logplayer", self.queue_snapshot)
         self.log_players.start()
 
     def cog_unload(self):
+        server_poller.unsubscribe("logplayer")
         self.log_players.cancel()
 
+    async def queue_snapshot(self, snapshot: ServerSnapshot):
+        self.pending[snapshot.key] = snapshot
+
     @tasks.loop(seconds=30)
     async def log_players(self):
-        servers = await fetch_all_servers()
+        snapshots, self.pending = self.pending, {}
+        if not snapshots:
+            return
         now = datetime.datetime.now(datetime.timezone.utc).isoformat()
 
-        if not hasattr(self, 'server_online_cache'):
-            self.server_online_cache = {}
-
-        for server in servers:
-            guild_id, server_name, host, password, api_port, rcon_port = server
-            try:
-                player_list = await api_cache.get_player_list(host, api_port, password)
-                current_online = set(player['userId'] for player in player_list['players'])
-                previous_online = self.server_online_cache.get(server_name, set())
-                self.server_online_cache[server_name] = current_online
-
-                for player in player_list['players']:
-                    await add_player(player)
-
-                await track_sessions(current_online, previous_online, now)
+        roster = [player for snapshot in snapshots.values() for player in snapshot.players]
+        await fan_out(
+            snapshots.values(),
+            lambda snapshot: track_sessions(*snapshot.key, set(player['userId'] for player in snapshot.players), now),
+            limit=4,
+            label=lambda snapshot: f"Tracking sessions for '{snapshot.server.server_name}'"
+        )
 
-            except Exception as e:
-                logging.error(f"API unreachable for '{server_name}': {str(e)}")
+        try:
+            await add_players(roster)
+        except Exception as e:
+            logging.error(f"Failed to store player roster: {str(e)}")
 
     async def player_autocomplete(self, interaction: discord.Interaction, current: str):
         players = await player_autocomplete(current)
@@ -1,70 +1,95 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from utils.database import (
     server_autocomplete,
-    fetch_server_details,
     add_query,
     fetch_query,
-    delete_query,
-    fetch_all_servers
+    delete_query
 )
-from palworld_api import PalworldAPI
+from utils.serverregistry import server_registry
 from utils.apicache import api_cache
+from utils.poller import server_poller, ServerSnapshot
+from utils.circuitbreaker import circuit_breaker, server_key, ServerHealth, OPEN
+from utils.sendqueue import send_queue
 import utils.constants as c
 import logging
-import asyncio
+import hashlib
+import json
 
 class ServerQueryCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.update_messages.start()
+        self.handles = {}
+        self.rendered = {}
+        server_poller.subscribe("query", self.update_messages, interval=30)
+        circuit_breaker.subscribe(self.on_health_change)
 
     def cog_unload(self):
-        self.update_messages.cancel()
-
-    @tasks.loop(seconds=180)
-    async def update_messages(self):
-        servers = await fetch_all_servers()
-        for server in servers:
-            guild_id, server_name, host, password, api_port, rcon_port = server
-            message_ids = await fetch_query(guild_id, server_name)
-            if message_ids:
-                channel_id, message_id, player_message_id = message_ids
-                channel = self.bot.get_channel(channel_id)
-                if channel:
-                    try:
-                        server_config = await fetch_server_details(guild_id, server_name)
-                        if not server_config:
-                            continue
-
-                        server_info, server_metrics, player_list = await api_cache.get_all_server_data(host, api_port, password)
-
-                        server_embed = self.create_server_embed(server_name, server_info, server_metrics)
-                        player_embed = self.create_player_embed(player_list)
-
-                        try:
-                            message = await channel.fetch_message(message_id)
-                            await message.edit(embed=server_embed)
-                        except discord.NotFound:
-                            message = await channel.send(embed=server_embed)
-                            await add_query(guild_id, channel_id, server_name, message.id, player_message_id)
-                        
-                        await asyncio.sleep(5)
-
-                        try:
-                            player_message = await channel.fetch_message(player_message_id)
-                            await player_message.edit(embed=player_embed)
-                        except discord.NotFound:
-                            player_message = await channel.send(embed=player_embed)
-                            await add_query(guild_id, channel_id, server_name, message.id, player_message.id)
-
-                        await asyncio.sleep(5)
-
-                    except Exception as e:
-                        logging.error(f"Error updating query server: '{server_name}': {str(e)}")
-
-    def create_server_embed(self, server_name, server_info, server_metrics):
+        server_poller.unsubscribe("query")
+        circuit_breaker.unsubscribe(self.on_health_change)
+
+    async def get_handles(self, guild_id, server_name):
+        key = (guild_id, server_name)
+        if key not in self.handles:
+            self.handles[key] = await fetch_query(guild_id, server_name)
+        return self.handles[key]
+
+    def forget_handles(self, guild_id, server_name):
+        handles = self.handles.pop((guild_id, server_name), None)
+        if handles:
+            self.rendered.pop(handles[1], None)
+            self.rendered.pop(handles[2], None)
+
+    def embed_digest(self, embed: discord.Embed):
+        return hashlib.sha1(json.dumps(embed.to_dict(), sort_keys=True).encode()).hexdigest()
+
+    async def publish(self, channel, message_id, embed: discord.Embed):
+        digest = self.embed_digest(embed)
+        if self.rendered.get(message_id) == digest:
+            return message_id
+        try:
+            # A partial message edits by id without fetching the message first.
+            await send_queue.edit(channel.id, channel.get_partial_message(message_id), label=f"query channel {channel.id}", embed=embed)
+        except discord.NotFound:
+            self.rendered.pop(message_id, None)
+            message = await send_queue.send(channel, label=f"query channel {channel.id}", embed=embed)
+            message_id = message.id
+        self.rendered[message_id] = digest
+        return message_id
+
+    async def on_health_change(self, key: str, health: ServerHealth):
+        # Snapshots stop arriving while a server is down, so re-render the last one with its new status.
+        if health.state != OPEN:
+            return
+        for snapshot in list(server_poller.latest.values()):
+            if server_key(snapshot.server.host, snapshot.server.api_port) == key:
+                await self.update_messages(snapshot, player_list=False)
+
+    async def update_messages(self, snapshot: ServerSnapshot, player_list: bool = True):
+        guild_id, server_name = snapshot.key
+        handles = await self.get_handles(guild_id, server_name)
+        if not handles:
+            return
+        channel_id, message_id, player_message_id = handles
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            return
+        try:
+            status = circuit_breaker.describe(server_key(snapshot.server.host, snapshot.server.api_port))
+            server_embed = self.create_server_embed(server_name, snapshot.server_info, snapshot.server_metrics, status)
+            new_message_id = await self.publish(channel, message_id, server_embed)
+            new_player_message_id = player_message_id
+            if player_list:
+                new_player_message_id = await self.publish(channel, player_message_id, self.create_player_embed(snapshot.player_list))
+
+            if (new_message_id, new_player_message_id) != (message_id, player_message_id):
+                await add_query(guild_id, channel_id, server_name, new_message_id, new_player_message_id)
+                self.handles[(guild_id, server_name)] = (channel_id, new_message_id, new_player_message_id)
+        except Exception as e:
+            logging.error(f"Error updating query server: '{server_name}': {str(e)}")
+
+    def create_server_embed(self, server_name, server_info, server_metrics, status="Online"):
         embed = discord.Embed(
             title=f"{server_info.get('servername', server_name)}",
             description=f"{server_info.get('description', 'N/A')}",
@@ -77,6 +102,7 @@ class ServerQueryCog(commands.Cog):
         embed.add_field(name="FPS", value=server_metrics.get('serverfps', 'N/A'), inline=True)
         embed.add_field(name="Latency", value=f"{server_metrics.get('serverframetime', 'N/A'):.2f} ms", inline=True)
         embed.add_field(name="WorldGUID", value=f"`{server_info.get('worldguid', 'N/A')}`", inline=False)
+        embed.add_field(name="Status", value=status, inline=False)
         embed.set_thumbnail(url=c.SPHERE_THUMBNAIL)
         return embed
 
@@ -104,7 +130,7 @@ class ServerQueryCog(commands.Cog):
             await interaction.response.defer(ephemeral=True)
             guild_id = interaction.guild.id
 
-            server_config = await fetch_server_details(guild_id, server)
+            server_config = await server_registry.get(guild_id, server)
             if not server_config:
                 await interaction.followup.send(f"Server '{server}' configuration not found.", ephemeral=True)
                 return
@@ -115,13 +141,17 @@ class ServerQueryCog(commands.Cog):
 
             server_info, server_metrics, player_list = await api_cache.get_all_server_data(host, api_port, password)
 
-            server_embed = self.create_server_embed(server, server_info, server_metrics)
+            server_embed = self.create_server_embed(server, server_info, server_metrics, circuit_breaker.describe(server_key(host, api_port)))
             player_embed = self.create_player_embed(player_list)
 
             message = await channel.send(embed=server_embed)
             player_message = await channel.send(embed=player_embed)
 
             await add_query(guild_id, channel.id, server, message.id, player_message.id)
+            self.forget_handles(guild_id, server)
+            self.handles[(guild_id, server)] = (channel.id, message.id, player_message.id)
+            self.rendered[message.id] = self.embed_digest(server_embed)
+            self.rendered[player_message.id] = self.embed_digest(player_embed)
             await interaction.followup.send(f"Query channel for server `{server}` set to {channel.mention}.", ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f"Error in 'Add Query' command: {str(e)}", ephemeral=True)
@@ -135,6 +165,7 @@ class ServerQueryCog(commands.Cog):
             await interaction.response.defer(ephemeral=True)
             guild_id = interaction.guild.id
             await delete_query(guild_id, server)
+            self.forget_handles(guild_id, server)
             await interaction.followup.send(f"Query channel for server `{server}` removed.", ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f"Error in 'Remove Query' command: {str(e)}", ephemeral=True)
@@ -1,9 +1,8 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-from utils.database import fetch_all_servers, get_tracking, set_tracking
-from palworld_api import PalworldAPI
-from utils.apicache import api_cache
+from utils.database import get_tracking, set_tracking
+from utils.poller import server_poller
 import logging
 
 class PlayerTrackerCog(commands.Cog):
@@ -21,18 +20,15 @@ class PlayerTrackerCog(commands.Cog):
             if not guilds:
                 return
 
-            servers = await fetch_all_servers()
             total_players = 0
 
-            for server in servers:
+            for (guild_id, server_name), snapshot in list(server_poller.latest.items()):
                 try:
-                    guild_id, _, host, password, api_port, _ = server
                     if guild_id not in guilds:
                         continue
-                    metrics = await api_cache.get_server_metrics(host, api_port, password)
-                    total_players += metrics.get('currentplayernum', 0)
+                    total_players += snapshot.server_metrics.get('currentplayernum', 0)
                 except Exception as e:
-                    logging.error(f"Error fetching metrics from {server[1]}: {e}")
+                    logging.error(f"Error reading metrics from {server_name}: {e}")
                     continue
 
             try:
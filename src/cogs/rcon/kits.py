@@ -1,80 +1,46 @@
-import os
 import json
 import discord
 from discord.ext import commands
 from discord import app_commands
-import asyncio
-import aiosqlite
-from utils.rconutility import RconUtility
-from utils.database import fetch_server_details, server_autocomplete
+from utils.database import server_autocomplete
+from utils.serverregistry import server_registry
+from utils.dbpool import db_pool
+from utils.delivery import create_delivery, delivery_worker
 
 # This is all temporary till I separate the database stuff into its own utility file.
-DATABASE_PATH = os.path.join("data", "palworld.db")
-
-async def db_connection():
-    conn = None
-    try:
-        conn = await aiosqlite.connect(DATABASE_PATH)
-    except aiosqlite.Error as e:
-        print(e)
-    return conn
-
 async def ensure_kits_table():
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             CREATE TABLE IF NOT EXISTS kits (
                 kit_name TEXT PRIMARY KEY,
                 commands TEXT NOT NULL,
                 description TEXT NOT NULL
             )
         """)
-        await conn.commit()
-        await conn.close()
 
 async def get_kit(kit_name: str):
-    conn = await db_connection()
-    if conn is None:
-        return None
-    cursor = await conn.cursor()
-    await cursor.execute("SELECT commands, description FROM kits WHERE kit_name = ?", (kit_name,))
-    kit = await cursor.fetchone()
-    await conn.close()
-    return kit
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT commands, description FROM kits WHERE kit_name = ?", (kit_name,))
+        return await cursor.fetchone()
 
 async def save_kit(kit_name: str, commands_data: str, desc: str):
-    conn = await db_connection()
-    if conn is None:
-        return
-    cursor = await conn.cursor()
-    await cursor.execute("""
-        INSERT INTO kits (kit_name, commands, description)
-        VALUES (?, ?, ?)
-        ON CONFLICT(kit_name) DO UPDATE
-        SET commands=excluded.commands,
-            description=excluded.description
-    """,(kit_name, commands_data, desc))
-    await conn.commit()
-    await conn.close()
+    async with db_pool.writer() as conn:
+        await conn.execute("""
+            INSERT INTO kits (kit_name, commands, description)
+            VALUES (?, ?, ?)
+            ON CONFLICT(kit_name) DO UPDATE
+            SET commands=excluded.commands,
+                description=excluded.description
+        """,(kit_name, commands_data, desc))
 
 async def delete_kit(kit_name: str):
-    conn = await db_connection()
-    if conn is None:
-        return
-    cursor = await conn.cursor()
-    await cursor.execute("DELETE FROM kits WHERE kit_name = ?", (kit_name,))
-    await conn.commit()
-    await conn.close()
+    async with db_pool.writer() as conn:
+        await conn.execute("DELETE FROM kits WHERE kit_name = ?", (kit_name,))
 
 async def autocomplete_kits(interaction: discord.Interaction, current: str):
-    conn = await db_connection()
-    if conn is None:
-        return []
-    cursor = await conn.cursor()
-    await cursor.execute("SELECT kit_name FROM kits WHERE kit_name LIKE ?", (f"%{current}%",))
-    rows = await cursor.fetchall()
-    await conn.close()
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT kit_name FROM kits WHERE kit_name LIKE ?", (f"%{current}%",))
+        rows = await cursor.fetchall()
     return [app_commands.Choice(name=r[0], value=r[0]) for r in rows]
 
 class KitModal(discord.ui.Modal):
@@ -105,7 +71,6 @@ class KitModal(discord.ui.Modal):
 class KitsCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.rcon = RconUtility()
         self.servers = []
         bot.loop.create_task(ensure_kits_table())
         bot.loop.create_task(self.load_servers())
@@ -114,7 +79,7 @@ class KitsCog(commands.Cog):
         self.servers = []
 
     async def get_server_info(self, guild_id: int, server_name: str):
-        details = await fetch_server_details(guild_id, server_name)
+        details = await server_registry.get(guild_id, server_name)
         if details:
             return {"host": details[2], "password": details[3], "port": details[5]}
 
@@ -147,11 +112,10 @@ class KitsCog(commands.Cog):
         except:
             await interaction.followup.send("Commands data is not valid JSON.", ephemeral=True)
             return
-        for cmd_template in commands_list:
-            final_cmd = cmd_template.format(userid=userid)
-            await self.rcon.rcon_command(server_info["host"], server_info["port"], server_info["password"], final_cmd)
-            await asyncio.sleep(1)
-        await interaction.followup.send(f"Kit '{kit_name}' given to {userid} on '{server}'.", ephemeral=True)
+        final_cmds = [cmd_template.format(userid=userid) for cmd_template in commands_list]
+        job_id = await create_delivery(interaction.guild.id, server, interaction.user.id, "kit", f"{kit_name} for {userid}", final_cmds)
+        delivery_worker.watch(job_id, interaction)
+        await interaction.followup.send(f"Kit '{kit_name}' queued for {userid} on '{server}' (delivery #{job_id}).", ephemeral=True)
 
     @app_commands.command(name="managekit", description="Create or update a kit.")
     @app_commands.describe(kit_name="Kit name (optional). If it exists, it will be loaded.")
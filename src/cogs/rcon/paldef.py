@@ -1,10 +1,11 @@
 import os
-import json
 import discord
 from discord.ext import commands
 from discord import app_commands
 from utils.rconutility import RconUtility
-from utils.database import fetch_server_details, server_autocomplete
+from utils.database import server_autocomplete
+from utils.serverregistry import server_registry
+from utils.gamedata import GameDataIndex
 
 class PalDefenderCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -22,22 +23,19 @@ class PalDefenderCog(commands.Cog):
         self.servers = []
 
     def load_pals(self):
-        path = os.path.join("src", "gamedata", "paldata.json")
-        with open(path, "r", encoding="utf-8") as f:
-            self.pals = json.load(f).get("pals", [])
+        self.pal_index = GameDataIndex.load(os.path.join("src", "gamedata", "paldata.json"), "pals")
+        self.pals = self.pal_index.entries
 
     def load_items(self):
-        path = os.path.join("src", "gamedata", "itemdata.json")
-        with open(path, "r", encoding="utf-8") as f:
-            self.items = json.load(f).get("items", [])
+        self.item_index = GameDataIndex.load(os.path.join("src", "gamedata", "itemdata.json"), "items")
+        self.items = self.item_index.entries
 
     def load_tech(self):
-        path = os.path.join("src", "gamedata", "techdata.json")
-        with open(path, "r", encoding="utf-8") as f:
-            self.tech = json.load(f).get("technology", [])
+        self.tech_index = GameDataIndex.load(os.path.join("src", "gamedata", "techdata.json"), "technology", id_key="asset")
+        self.tech = self.tech_index.entries
 
     async def get_server_info(self, guild_id: int, server_name: str):
-        details = await fetch_server_details(guild_id, server_name)
+        details = await server_registry.get(guild_id, server_name)
         if details:
             return {"host": details[2], "password": details[3], "port": details[5]}
 
@@ -47,34 +45,13 @@ class PalDefenderCog(commands.Cog):
         return [app_commands.Choice(name=name, value=name) for name in server_names[:25]]
 
     async def autocomplete_pal(self, interaction: discord.Interaction, current: str):
-        results = []
-        for pal in self.pals:
-            name = pal.get("name", "")
-            dev_name = pal.get("id", "")
-            if current.lower() in name.lower() or current.lower() in dev_name.lower():
-                display = f"{name} ({dev_name})"
-                results.append(app_commands.Choice(name=display, value=dev_name))
-        return results[:10]
+        return [app_commands.Choice(name=f"{pal.get('name', '')} ({pal.get('id', '')})", value=pal.get("id", "")) for pal in self.pal_index.search(current)]
 
     async def autocomplete_item(self, interaction: discord.Interaction, current: str):
-        results = []
-        for item in self.items:
-            name = item.get("name", "")
-            item_id = item.get("id", "")
-            if current.lower() in name.lower() or current.lower() in item_id.lower():
-                display = f"{name} ({item_id})"
-                results.append(app_commands.Choice(name=display, value=item_id))
-        return results[:10]
+        return [app_commands.Choice(name=f"{item.get('name', '')} ({item.get('id', '')})", value=item.get("id", "")) for item in self.item_index.search(current)]
 
     async def autocomplete_tech(self, interaction: discord.Interaction, current: str):
-        results = []
-        for tech in self.tech:
-            name = tech.get("name", "")
-            asset = tech.get("asset", "")
-            if current.lower() in name.lower() or current.lower() in asset.lower():
-                display = f"{name} ({asset})"
-                results.append(app_commands.Choice(name=display, value=asset))
-        return results[:10]
+        return [app_commands.Choice(name=f"{tech.get('name', '')} ({tech.get('asset', '')})", value=tech.get("asset", "")) for tech in self.tech_index.search(current)]
 
     # Reload Config
     # RCON: reloadcfg
@@ -149,7 +126,7 @@ class PalDefenderCog(commands.Cog):
         if not info:
             await interaction.followup.send(f"Server not found: {server}", ephemeral=True)
             return
-        pal_data = next((x for x in self.pals if x["id"] == palid or x["name"] == palid), None)
+        pal_data = self.pal_index.resolve(palid)
         if not pal_data:
             await interaction.followup.send(f"Pal not found: {palid}", ephemeral=True)
             return
@@ -175,7 +152,7 @@ class PalDefenderCog(commands.Cog):
         if not info:
             await interaction.followup.send(f"Server not found: {server}", ephemeral=True)
             return
-        item_data = next((x for x in self.items if x["id"] == itemid or x["name"] == itemid), None)
+        item_data = self.item_index.resolve(itemid)
         if not item_data:
             await interaction.followup.send(f"Item not found: {itemid}", ephemeral=True)
             return
@@ -201,7 +178,7 @@ class PalDefenderCog(commands.Cog):
         if not info:
             await interaction.followup.send(f"Server not found: {server}", ephemeral=True)
             return
-        item_data = next((x for x in self.items if x["id"] == itemid or x["name"] == itemid), None)
+        item_data = self.item_index.resolve(itemid)
         if not item_data:
             await interaction.followup.send(f"Item not found: {itemid}", ephemeral=True)
             return
@@ -2,7 +2,8 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from utils.rconutility import RconUtility
-from utils.database import fetch_server_details, server_autocomplete
+from utils.database import server_autocomplete
+from utils.serverregistry import server_registry
 
 class RconCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -15,7 +16,7 @@ class RconCog(commands.Cog):
         self.servers = []
 
     async def get_server_info(self, guild_id: int, server_name: str):
-        details = await fetch_server_details(guild_id, server_name)
+        details = await server_registry.get(guild_id, server_name)
         if details:
             return {"host": details[2], "password": details[3], "port": details[5]}
 
@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 import os
-import zipfile
 import datetime
 import logging
 import asyncio
@@ -9,9 +8,15 @@ import yaml
 import tempfile
 import shutil
 import stat
-from paramiko import SSHClient, AutoAddPolicy
+import time
+from utils.sftpbackend import sftp_backend
+from utils.backupstore import BackupStore
+from utils.zipstream import ZipStreamWriter
+from utils.fanout import fan_out
 
 CONFIG_FILE = os.path.join("config", "sftp.yml")
+SMALL_FILE_BYTES = 8 * 1024 * 1024
+STREAM_CHUNK_BYTES = 4 * 1024 * 1024
 
 def load_yaml_config():
     if not os.path.exists(CONFIG_FILE):
@@ -24,6 +29,7 @@ class SFTPBackupCog(commands.Cog):
         self.bot = bot
         self.config = load_yaml_config().get("servers", [])
         self.last_run = {}
+        self.stores = {}
         self.poll_seconds = 60
         self.task = asyncio.create_task(self._loop())
 
@@ -31,69 +37,111 @@ class SFTPBackupCog(commands.Cog):
         if self.task:
             self.task.cancel()
 
-    def _sftp_connect(self, cfg):
-        ssh = SSHClient()
-        ssh.set_missing_host_key_policy(AutoAddPolicy())
-        ssh.connect(
-            hostname=cfg["host"],
-            username=cfg["username"],
-            password=cfg["password"],
-            port=int(cfg.get("port", 2022)),
-            timeout=15,
-        )
-        sftp = ssh.open_sftp()
-        return ssh, sftp
-
-    def _safe_exists_dir(self, sftp, path):
+    async def _safe_exists_dir(self, sftp, path):
         try:
-            return stat.S_ISDIR(sftp.stat(path).st_mode)
+            return stat.S_ISDIR((await sftp.stat(path)).st_mode)
         except:
             return False
 
-    def _safe_exists_file(self, sftp, path):
+    async def _safe_exists_file(self, sftp, path):
         try:
-            return stat.S_ISREG(sftp.stat(path).st_mode)
+            return stat.S_ISREG((await sftp.stat(path)).st_mode)
         except:
             return False
 
-    def _sftp_fetch_recursive(self, sftp, remote_dir, local_dir):
-        os.makedirs(local_dir, exist_ok=True)
-        for entry in sftp.listdir_attr(remote_dir):
+    async def _remote_entries(self, sftp, remote_dir, rel_dir, entries):
+        for entry in await sftp.listdir_attr(remote_dir):
             rpath = f"{remote_dir}/{entry.filename}"
-            lpath = os.path.join(local_dir, entry.filename)
+            rel = f"{rel_dir}/{entry.filename}"
             if stat.S_ISDIR(entry.st_mode):
-                self._sftp_fetch_recursive(sftp, rpath, lpath)
+                await self._remote_entries(sftp, rpath, rel, entries)
             else:
-                sftp.get(rpath, lpath)
+                entries.append((rpath, rel, entry))
+        return entries
 
-    def _download_remote_save(self, cfg, staging_dir):
-        ssh = None
-        sftp = None
+    async def _collect_entries(self, sftp, remote_root):
+        entries = []
+        if await self._safe_exists_dir(sftp, f"{remote_root}/Players"):
+            await self._remote_entries(sftp, f"{remote_root}/Players", "Players", entries)
+        for name in ("Level.sav", "LevelMeta.sav"):
+            if await self._safe_exists_file(sftp, f"{remote_root}/{name}"):
+                entries.append((f"{remote_root}/{name}", name, await sftp.stat(f"{remote_root}/{name}")))
+        return entries
+
+    async def _fetch_blob(self, cfg, store, rpath, rel, attrs):
+        tmp = store.temp_path(rel)
+        os.makedirs(os.path.dirname(tmp), exist_ok=True)
+        async with sftp_backend.client(cfg) as sftp:
+            await sftp.get(rpath, tmp)
+        return await asyncio.to_thread(store.commit, rel, attrs.st_size, int(attrs.st_mtime), tmp)
+
+    async def _download_incremental(self, cfg, store):
+        remote_root = cfg.get("save_path") or ""
+        if not remote_root:
+            return None
         try:
-            ssh, sftp = self._sftp_connect(cfg)
-            remote_root = cfg.get("save_path") or ""
-            if not remote_root:
-                return False
-            players_dir = f"{remote_root}/Players"
-            level_sav = f"{remote_root}/Level.sav"
-            meta_sav = f"{remote_root}/LevelMeta.sav"
-            if self._safe_exists_dir(sftp, players_dir):
-                self._sftp_fetch_recursive(sftp, players_dir, os.path.join(staging_dir, "Players"))
-            if self._safe_exists_file(sftp, level_sav):
-                sftp.get(level_sav, os.path.join(staging_dir, "Level.sav"))
-            if self._safe_exists_file(sftp, meta_sav):
-                sftp.get(meta_sav, os.path.join(staging_dir, "LevelMeta.sav"))
-            return True
+            async with sftp_backend.client(cfg) as sftp:
+                entries = await self._collect_entries(sftp, remote_root)
+            files = {rel: store.lookup(rel, attrs.st_size, int(attrs.st_mtime)) for _, rel, attrs in entries}
+            pending = [entry for entry in entries if files[entry[1]] is None]
+            # Each download checks out its own channel, so small player saves no longer wait on one another.
+            results = await fan_out(
+                pending, lambda entry: self._fetch_blob(cfg, store, *entry),
+                limit=self._parallel(cfg), timeout=None,
+                label=lambda entry: f"[{cfg.get('name','?')}] Fetching {entry[1]}"
+            )
+            for (_, rel, _), blob in zip(pending, results):
+                if isinstance(blob, BaseException):
+                    return None
+                files[rel] = blob
+            await asyncio.to_thread(store.retain, files)
+            return files, len(pending), sum(attrs.st_size for _, _, attrs in pending)
         except Exception as e:
-            logging.error(f"[{cfg.get('name','?')}] SFTP fetch error: {e}")
-            return False
+            logging.error(f"[{cfg.get('name','?')}] SFTP incremental fetch error: {e}")
+            return None
         finally:
-            try:
-                if sftp: sftp.close()
-            except: pass
-            try:
-                if ssh: ssh.close()
-            except: pass
+            # Blobs committed before a failure stay usable for the next run.
+            await asyncio.to_thread(store.save)
+
+    async def _read_whole(self, cfg, rpath, attrs):
+        async with sftp_backend.client(cfg) as sftp:
+            return await sftp.read(rpath, 0, attrs.st_size)
+
+    async def _stream_full(self, cfg, writer):
+        remote_root = cfg.get("save_path") or ""
+        if not remote_root:
+            return None
+        parallel = self._parallel(cfg)
+        async with sftp_backend.client(cfg) as sftp:
+            entries = await self._collect_entries(sftp, remote_root)
+            index = 0
+            while index < len(entries):
+                rpath, rel, attrs = entries[index]
+                if attrs.st_size > SMALL_FILE_BYTES:
+                    await writer.add_stream(rel, sftp.iter_chunks(rpath, STREAM_CHUNK_BYTES), attrs.st_mtime, attrs.st_size)
+                    index += 1
+                    continue
+                # Runs of small files are read in parallel, then written to the archive in order.
+                batch = []
+                while index < len(entries) and len(batch) < parallel and entries[index][2].st_size <= SMALL_FILE_BYTES:
+                    batch.append(entries[index])
+                    index += 1
+                contents = await asyncio.gather(*(self._read_whole(cfg, rpath, attrs) for rpath, _, attrs in batch))
+                for (_, rel, attrs), data in zip(batch, contents):
+                    await writer.add_stream(rel, self._single_chunk(data), attrs.st_mtime, len(data))
+        return len(entries)
+
+    async def _single_chunk(self, data):
+        yield data
+
+    def _parallel(self, cfg):
+        return max(1, int(cfg.get("backup_parallel", 4)))
+
+    def _store(self, cfg):
+        name = cfg.get("name", "server")
+        if name not in self.stores:
+            self.stores[name] = BackupStore(name)
+        return self.stores[name]
 
     async def _run_backup_once(self, cfg):
         channel_id = int(cfg.get("backup_channel", 0) or 0)
@@ -105,39 +153,58 @@ class SFTPBackupCog(commands.Cog):
                 channel = await self.bot.fetch_channel(channel_id)
             except:
                 return
-        staging_dir = tempfile.mkdtemp(prefix=f"backup_{cfg.get('name','srv')}_", dir="logs" if os.path.isdir("logs") else None)
-        ok = await asyncio.to_thread(self._download_remote_save, cfg, staging_dir)
-        if not ok:
-            shutil.rmtree(staging_dir, ignore_errors=True)
-            return
-        zip_name = f"{cfg.get('name','server')}_{datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
-        zip_path = os.path.join(staging_dir, zip_name)
+        work_dir = tempfile.mkdtemp(prefix=f"backup_{cfg.get('name','srv')}_", dir="logs" if os.path.isdir("logs") else None)
+        writer = None
         try:
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as z:
-                for root, dirs, files in os.walk(staging_dir):
-                    for f in files:
-                        if f == os.path.basename(zip_path):
-                            continue
-                        fp = os.path.join(root, f)
-                        rel = os.path.relpath(fp, staging_dir)
-                        z.write(fp, rel)
+            zip_name = f"{cfg.get('name','server')}_{datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip"
+            zip_path = os.path.join(work_dir, zip_name)
+            note = "Backup created successfully."
+            started = time.monotonic()
+            if cfg.get("backup_mode", "full") == "incremental":
+                result = await self._download_incremental(cfg, self._store(cfg))
+                if result is None:
+                    return
+                files, fetched, transferred = result
+                elapsed = time.monotonic() - started
+                note = f"Backup created successfully. {fetched} of {len(files)} files changed since the last backup."
+                writer = ZipStreamWriter(zip_path, cfg.get("backup_compression", "deflate"), cfg.get("backup_compression_level"))
+                for rel, blob in files.items():
+                    await writer.add_file(blob, rel)
+            else:
+                # Remote files stream straight into the archive; nothing is staged on disk first.
+                writer = ZipStreamWriter(zip_path, cfg.get("backup_compression", "deflate"), cfg.get("backup_compression_level"))
+                try:
+                    if await self._stream_full(cfg, writer) is None:
+                        return
+                except Exception as e:
+                    logging.error(f"[{cfg.get('name','?')}] SFTP fetch error: {e}")
+                    return
+                transferred = writer.bytes_in
+                elapsed = time.monotonic() - started
+            await writer.close()
+            rate = transferred / max(elapsed, 0.001) / 1048576
+            transfer = f"{transferred/1048576:.2f} MB in {elapsed:.1f}s ({rate:.2f} MB/s)"
+            logging.info(f"[{cfg.get('name','?')}] Backup transfer: {transfer}")
             file_size = os.path.getsize(zip_path)
             ts = discord.utils.utcnow()
             embed = discord.Embed(
                 title=f"Backup Completed - {cfg.get('name','server')}",
                 color=discord.Color.blurple(),
-                description="Backup created successfully."
+                description=note
             )
             embed.add_field(name="Filename", value=zip_name, inline=False)
             embed.add_field(name="Size", value=f"{file_size/1024:.2f} KB", inline=False)
+            embed.add_field(name="Transfer", value=transfer, inline=False)
             embed.add_field(name="Time", value=f"<t:{int(ts.timestamp())}:F>", inline=False)
             await channel.send(embed=embed)
             await channel.send(file=discord.File(zip_path))
         except Exception as e:
             logging.error(f"[{cfg.get('name','?')}] Backup packaging/send error: {e}")
         finally:
+            if writer:
+                await writer.abort()
             try:
-                shutil.rmtree(staging_dir, ignore_errors=True)
+                shutil.rmtree(work_dir, ignore_errors=True)
             except: pass
 
     async def _loop(self):
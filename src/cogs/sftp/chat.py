@@ -2,13 +2,14 @@ import discord
 from discord.ext import commands
 import aiohttp
 import re
-from paramiko import SSHClient, AutoAddPolicy
 import logging
 import os
 import asyncio
 import yaml
-from utils.database import fetch_server_details, verify_link_code, link_player, fetch_player
-from palworld_api import PalworldAPI
+from utils.database import verify_link_code, link_player, fetch_player
+from utils.serverregistry import server_registry
+from utils.logtail import LogTail, LogDirectory
+from utils.sftpbackend import sftp_backend
 
 CONFIG_FILE = os.path.join("config", "sftp.yml")
 
@@ -23,8 +24,8 @@ class SFTPChatCog(commands.Cog):
         self.bot = bot
         self.config = load_yaml_config().get("servers", [])
         self.sessions = {}
-        self.last_processed_line = {}
-        self.first_check_done = {}
+        self.tails = {}
+        self.log_dirs = {}
         self.tasks = {}
         self.interval = 15
         self.blocked_phrases = ["/adminpassword", "/creativemenu", "/", "!"]
@@ -35,8 +36,8 @@ class SFTPChatCog(commands.Cog):
         for cfg in self.config:
             name = cfg["name"]
             self.sessions[name] = aiohttp.ClientSession()
-            self.last_processed_line[name] = None
-            self.first_check_done[name] = False
+            self.tails[name] = LogTail()
+            self.log_dirs[name] = LogDirectory(cfg.get("path", "Pal/Binaries/Win64/PalDefender/Logs"))
             self.tasks[name] = asyncio.create_task(self._server_worker(cfg))
 
     async def cog_unload(self):
@@ -45,77 +46,28 @@ class SFTPChatCog(commands.Cog):
         await asyncio.gather(*self.tasks.values(), return_exceptions=True)
         await asyncio.gather(*(s.close() for s in self.sessions.values()), return_exceptions=True)
 
-    def _connect_and_read(self, cfg, last_line, first_done):
-        ssh = None
-        sftp = None
+    async def _connect_and_read(self, cfg, tail, log_dir):
         try:
-            ssh = SSHClient()
-            ssh.set_missing_host_key_policy(AutoAddPolicy())
-            ssh.connect(
-                hostname=cfg["host"],
-                username=cfg["username"],
-                password=cfg["password"],
-                port=int(cfg.get("port", 2022)),
-                timeout=10,
-            )
-            sftp = ssh.open_sftp()
-            log_dir = cfg.get("path", "Pal/Binaries/Win64/PalDefender/Logs")
-            sftp.chdir(log_dir)
-            files = sorted(sftp.listdir(), key=lambda x: sftp.stat(x).st_mtime, reverse=True)
-            log_file_path = next((f for f in files if f.endswith(".log") or f.endswith(".txt")), None)
-            if not log_file_path:
-                return [], last_line, first_done
-            with sftp.file(log_file_path, "r") as file:
-                content = file.read().decode("utf-8", errors="ignore")
-                lines = content.splitlines()
-            if not first_done:
-                return [], lines[-1] if lines else None, True
-            new_lines = []
-            new_lines_start = False
-            for line in lines:
-                if line == last_line:
-                    new_lines_start = True
-                    continue
-                if new_lines_start or last_line is None:
-                    if "[Chat::" in line:
-                        new_lines.append(line)
-            return new_lines, lines[-1] if lines else last_line, True
+            async with sftp_backend.client(cfg) as sftp:
+                log_file = await log_dir.newest(sftp)
+                if not log_file:
+                    return []
+                lines = await tail.poll(sftp, f"{log_dir.path}/{log_file.filename}", log_file.st_size)
+                return [line for line in lines if "[Chat::" in line]
         except Exception as e:
             logging.error(f"[{cfg['name']}] SFTP error: {e}")
-            return [], last_line, first_done
-        finally:
-            if sftp:
-                try:
-                    sftp.close()
-                except:
-                    pass
-            if ssh:
-                try:
-                    ssh.close()
-                except:
-                    pass
+            return []
 
     async def _server_worker(self, cfg):
         name = cfg["name"]
         while True:
             try:
-                lines, new_last, first_done = await asyncio.to_thread(
-                    self._connect_and_read,
-                    cfg,
-                    self.last_processed_line[name],
-                    self.first_check_done[name],
-                )
-                if not self.first_check_done[name] and first_done:
-                    self.last_processed_line[name] = new_last
-                    self.first_check_done[name] = True
-                else:
-                    for line in lines:
-                        await self.process_and_send(cfg, line)
-                        if "link_channel" in cfg:
-                            await self.process_link_command(cfg, line)
-                        await asyncio.sleep(1)
-                    self.last_processed_line[name] = new_last
-                    self.first_check_done[name] = first_done
+                lines = await self._connect_and_read(cfg, self.tails[name], self.log_dirs[name])
+                for line in lines:
+                    await self.process_and_send(cfg, line)
+                    if "link_channel" in cfg:
+                        await self.process_link_command(cfg, line)
+                    await asyncio.sleep(1)
             except Exception as e:
                 logging.error(f"[{name}] Worker error: {e}")
             await asyncio.sleep(self.interval)
@@ -193,12 +145,8 @@ class SFTPChatCog(commands.Cog):
                 return
             for cfg in self.config:
                 if "channel" in cfg and str(message.channel.id) == str(cfg["channel"]) and "name" in cfg:
-                    details = await fetch_server_details(message.guild.id, cfg["name"])
-                    if details:
-                        host = details[2]
-                        password = details[3]
-                        api_port = details[4]
-                        api = PalworldAPI(f"http://{host}:{api_port}", password)
+                    api = await server_registry.get_api(message.guild.id, cfg["name"])
+                    if api:
                         await api.make_announcement(f"[{message.author.name}]: {message.content}")
         except Exception as e:
             logging.error(f"Error in on_message: {e}", exc_info=True)
@@ -3,7 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 import random
 import string
-from src.utils.database import create_link_code, get_link_code, get_linked_player, fetch_player
+from utils.database import create_link_code, get_link_code, get_linked_player, fetch_player
 
 def generate_code(length=6):
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
@@ -5,9 +5,8 @@ import datetime
 import logging
 import asyncio
 import yaml
-from paramiko import SSHClient, AutoAddPolicy
-from utils.database import fetch_server_details
-from palworld_api import PalworldAPI
+from utils.serverregistry import server_registry
+from utils.sftpbackend import sftp_backend
 
 CONFIG_FILE = os.path.join("config", "sftp.yml")
 
@@ -33,32 +32,9 @@ class SFTPSaveCheckCog(commands.Cog):
         for t in self.tasks.values():
             t.cancel()
 
-    def _sftp_stat_mtime(self, cfg, remote_path):
-        ssh = None
-        sftp = None
-        try:
-            ssh = SSHClient()
-            ssh.set_missing_host_key_policy(AutoAddPolicy())
-            ssh.connect(
-                hostname=cfg["host"],
-                username=cfg["username"],
-                password=cfg["password"],
-                port=int(cfg.get("port", 2022)),
-                timeout=10,
-            )
-            sftp = ssh.open_sftp()
-            return sftp.stat(remote_path).st_mtime
-        finally:
-            try:
-                if sftp:
-                    sftp.close()
-            except:
-                pass
-            try:
-                if ssh:
-                    ssh.close()
-            except:
-                pass
+    async def _sftp_stat_mtime(self, cfg, remote_path):
+        async with sftp_backend.client(cfg) as sftp:
+            return (await sftp.stat(remote_path)).st_mtime
 
     async def _worker(self, cfg):
         name = cfg["name"]
@@ -71,15 +47,13 @@ class SFTPSaveCheckCog(commands.Cog):
             try:
                 now = datetime.datetime.utcnow().timestamp()
                 try:
-                    mod_time = await asyncio.to_thread(self._sftp_stat_mtime, cfg, level_path)
+                    mod_time = await self._sftp_stat_mtime(cfg, level_path)
                 except Exception as e:
                     logging.warning(f"[{name}] save mtime check failed: {e}")
                     self.failure_count[name] += 1
                     if self.failure_count[name] >= self.failure_threshold:
-                        details = await fetch_server_details(cfg.get("guild_id", 0), name) if "guild_id" in cfg else await fetch_server_details(0, name)
-                        if details:
-                            host = details[2]; password = details[3]; api_port = details[4]
-                            api = PalworldAPI(f"http://{host}:{api_port}", password)
+                        api = await server_registry.get_api(cfg.get("guild_id", 0), name)
+                        if api:
                             try:
                                 await api.shutdown_server(30, "Save check failed repeatedly. Restarting in 30 seconds.")
                             except Exception as ex:
@@ -109,10 +83,8 @@ class SFTPSaveCheckCog(commands.Cog):
                 self.last_mod_time[name] = mod_time
 
                 if self.failure_count[name] >= self.failure_threshold:
-                    details = await fetch_server_details(cfg.get("guild_id", 0), name) if "guild_id" in cfg else await fetch_server_details(0, name)
-                    if details:
-                        host = details[2]; password = details[3]; api_port = details[4]
-                        api = PalworldAPI(f"http://{host}:{api_port}", password)
+                    api = await server_registry.get_api(cfg.get("guild_id", 0), name)
+                    if api:
                         try:
                             await api.shutdown_server(30, "Save stalled! Restarting in 30 seconds!")
                             logging.info(f"[{name}] save stalled — initiating restart.")
@@ -15,6 +15,8 @@ async def ping(ctx):
     await ctx.send(f'Pong! {round(bot.latency * 1000)}ms')
 
 bot.setup_hook = lambda: settings.setup_hook(bot)
+_close = bot.close
+bot.close = lambda: settings.close_hook(_close)
 
 @bot.event
 async def on_ready():
@@ -1,87 +1,183 @@
 import asyncio
 import time
-from typing import Dict, Tuple, Optional
-from palworld_api import PalworldAPI
+from typing import Dict, Iterable, Tuple, Optional
+from utils.apiclient import api_clients
+from utils.circuitbreaker import circuit_breaker, server_key, CircuitOpenError
 import logging
 
+ENDPOINTS = {
+    "info": "get_server_info",
+    "metrics": "get_server_metrics",
+    "players": "get_player_list",
+}
+
+DEFAULT_TTLS = {"players": 10, "metrics": 30, "info": 600}
+
+class CachedEndpoint:
+    def __init__(self, data, timestamp):
+        self.data = data
+        self.timestamp = timestamp
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
 class CachedServerData:
-    def __init__(self, server_info, server_metrics, player_list, timestamp):
+    def __init__(self, server_info, server_metrics, player_list, timestamp, oldest=None):
         self.server_info = server_info
         self.server_metrics = server_metrics
         self.player_list = player_list
         self.timestamp = timestamp
+        self.oldest = oldest if oldest is not None else timestamp
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.oldest
+
+class StaleDataError(Exception):
+    pass
 
 class APICache:
-    def __init__(self, cache_duration: int = 15):
-        self.cache: Dict[str, CachedServerData] = {}
-        self.cache_duration = cache_duration
-        self.locks: Dict[str, asyncio.Lock] = {}
-    
+    def __init__(self, ttls: Optional[Dict[str, int]] = None, max_staleness: int = 120, refresh_ahead: int = 5, idle_timeout: int = 300):
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.cache: Dict[Tuple[str, str], CachedEndpoint] = {}
+        self.max_staleness = max_staleness
+        self.refresh_ahead = refresh_ahead
+        self.idle_timeout = idle_timeout
+        self.inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.refreshers: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.last_access: Dict[Tuple[str, str], float] = {}
+
     def _get_cache_key(self, host: str, api_port: int) -> str:
-        return f"{host}:{api_port}"
-    
-    def _is_cache_valid(self, cached_data: CachedServerData) -> bool:
-        return (time.time() - cached_data.timestamp) < self.cache_duration
-    
-    async def get_all_server_data(self, host: str, api_port: int, password: str) -> Tuple[Optional[dict], Optional[dict], Optional[dict]]:
+        return server_key(host, api_port)
+
+    def _is_cache_valid(self, endpoint: str, cached_data: CachedEndpoint) -> bool:
+        return cached_data.age < self.ttls[endpoint]
+
+    def _is_servable(self, endpoint: str, cached_data: CachedEndpoint) -> bool:
+        # max_staleness is how long past its own TTL an endpoint may still be served.
+        return cached_data.age < self.ttls[endpoint] + self.max_staleness
+
+    def _check_response(self, result):
+        if isinstance(result, Exception):
+            raise result
+        # PalworldAPI reports transport and HTTP failures as {"error": ...} instead of raising.
+        if isinstance(result, dict) and set(result) == {"error"}:
+            raise ConnectionError(result["error"])
+        return result
+
+    async def _fetch(self, entry_key: Tuple[str, str], host: str, api_port: int, password: str) -> CachedEndpoint:
+        cache_key, endpoint = entry_key
+        try:
+            # Fail fast while the server's circuit is open instead of waiting out another timeout.
+            if circuit_breaker.is_open(cache_key):
+                raise CircuitOpenError(f"Server {cache_key} is unreachable ({circuit_breaker.describe(cache_key)})")
+            api = api_clients.client(host, api_port, password)
+            data = self._check_response(await getattr(api, ENDPOINTS[endpoint])())
+            cached = CachedEndpoint(data, time.time())
+            self.cache[entry_key] = cached
+            return cached
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching {endpoint} for {cache_key}: {e}")
+            raise
+        finally:
+            self.inflight.pop(entry_key, None)
+
+    def _refresh(self, entry_key: Tuple[str, str], host: str, api_port: int, password: str) -> asyncio.Task:
+        task = self.inflight.get(entry_key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(entry_key, host, api_port, password))
+            # Background refreshes may fail with nobody awaiting them; the error is already logged.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.inflight[entry_key] = task
+        return task
+
+    async def _refresh_loop(self, entry_key: Tuple[str, str], host: str, api_port: int, password: str):
+        ttl = self.ttls[entry_key[1]]
+        ahead = min(self.refresh_ahead, ttl / 5)
+        try:
+            while time.time() - self.last_access.get(entry_key, 0) < self.idle_timeout:
+                cached = self.cache.get(entry_key)
+                delay = ttl - ahead - (cached.age if cached else ttl)
+                await asyncio.sleep(max(delay, 1))
+                try:
+                    await asyncio.shield(self._refresh(entry_key, host, api_port, password))
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    await asyncio.sleep(ttl)
+        finally:
+            if self.refreshers.get(entry_key) is asyncio.current_task():
+                del self.refreshers[entry_key]
+
+    def _ensure_refresher(self, entry_key: Tuple[str, str], host: str, api_port: int, password: str):
+        if entry_key not in self.refreshers:
+            self.refreshers[entry_key] = asyncio.create_task(self._refresh_loop(entry_key, host, api_port, password))
+
+    async def get_endpoint(self, host: str, api_port: int, password: str, endpoint: str) -> CachedEndpoint:
         cache_key = self._get_cache_key(host, api_port)
-        
-        if cache_key not in self.locks:
-            self.locks[cache_key] = asyncio.Lock()
-        
-        async with self.locks[cache_key]:
-            if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
-                cached = self.cache[cache_key]
-                return cached.server_info, cached.server_metrics, cached.player_list
-            
-            try:
-                api = PalworldAPI(f"http://{host}:{api_port}", password)
-                
-                server_info, server_metrics, player_list = await asyncio.gather(
-                    api.get_server_info(),
-                    api.get_server_metrics(),
-                    api.get_player_list(),
-                    return_exceptions=True
-                )
-                
-                if isinstance(server_info, Exception):
-                    raise server_info
-                if isinstance(server_metrics, Exception):
-                    raise server_metrics
-                if isinstance(player_list, Exception):
-                    raise player_list
-                
-                self.cache[cache_key] = CachedServerData(
-                    server_info=server_info,
-                    server_metrics=server_metrics,
-                    player_list=player_list,
-                    timestamp=time.time()
-                )
-                
-                return server_info, server_metrics, player_list
-                
-            except Exception as e:
-                logging.error(f"Error fetching data for {cache_key}: {e}")
-                raise
-    
+        entry_key = (cache_key, endpoint)
+        self.last_access[entry_key] = time.time()
+        self._ensure_refresher(entry_key, host, api_port, password)
+
+        cached = self.cache.get(entry_key)
+        if cached and self._is_cache_valid(endpoint, cached):
+            return cached
+        if cached and self._is_servable(endpoint, cached):
+            self._refresh(entry_key, host, api_port, password)
+            return cached
+
+        try:
+            return await asyncio.shield(self._refresh(entry_key, host, api_port, password))
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if cached:
+                raise StaleDataError(f"Last good {endpoint} for {cache_key} is {int(cached.age)}s old and refresh failed: {e}") from e
+            raise
+
+    async def get_snapshot(self, host: str, api_port: int, password: str, endpoints: Iterable[str] = ("info", "metrics", "players")) -> CachedServerData:
+        endpoints = tuple(endpoints)
+        entries = await asyncio.gather(*(self.get_endpoint(host, api_port, password, e) for e in endpoints))
+        data = dict(zip(endpoints, entries))
+        timestamps = [entry.timestamp for entry in entries]
+        return CachedServerData(
+            server_info=data["info"].data if "info" in data else None,
+            server_metrics=data["metrics"].data if "metrics" in data else None,
+            player_list=data["players"].data if "players" in data else None,
+            timestamp=max(timestamps),
+            oldest=min(timestamps)
+        )
+
+    async def get_all_server_data(self, host: str, api_port: int, password: str) -> Tuple[Optional[dict], Optional[dict], Optional[dict]]:
+        cached = await self.get_snapshot(host, api_port, password)
+        return cached.server_info, cached.server_metrics, cached.player_list
+
     async def get_server_info(self, host: str, api_port: int, password: str) -> Optional[dict]:
-        server_info, _, _ = await self.get_all_server_data(host, api_port, password)
-        return server_info
-    
+        return (await self.get_endpoint(host, api_port, password, "info")).data
+
     async def get_server_metrics(self, host: str, api_port: int, password: str) -> Optional[dict]:
-        _, server_metrics, _ = await self.get_all_server_data(host, api_port, password)
-        return server_metrics
-    
+        return (await self.get_endpoint(host, api_port, password, "metrics")).data
+
     async def get_player_list(self, host: str, api_port: int, password: str) -> Optional[dict]:
-        _, _, player_list = await self.get_all_server_data(host, api_port, password)
-        return player_list
-    
+        return (await self.get_endpoint(host, api_port, password, "players")).data
+
     def invalidate_cache(self, host: str, api_port: int):
         cache_key = self._get_cache_key(host, api_port)
-        if cache_key in self.cache:
-            del self.cache[cache_key]
-    
+        for entry_key in [k for k in self.cache if k[0] == cache_key]:
+            del self.cache[entry_key]
+
     def clear_all_cache(self):
         self.cache.clear()
 
-api_cache = APICache(cache_duration=25)
+    async def close(self):
+        tasks = list(self.refreshers.values()) + list(self.inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.refreshers.clear()
+        self.inflight.clear()
+
+api_cache = APICache(ttls={"players": 10, "metrics": 30, "info": 600})
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+import aiohttp
+from palworld_api import PalworldAPI
+from utils.circuitbreaker import circuit_breaker, server_key, CircuitOpenError
+
+class PooledPalworldAPI(PalworldAPI):
+    def __init__(self, pool: "APIClientPool", server_url: str, password: str, key: str):
+        super().__init__(server_url, password)
+        self.pool = pool
+        self.key = key
+
+    async def _request(self, method: str, url: str, payload=None):
+        try:
+            circuit_breaker.acquire(self.key)
+        except CircuitOpenError as e:
+            return {"error": str(e)}
+        try:
+            session = await self.pool.session()
+            async with session.request(method, url, json=payload, headers=self.headers) as response:
+                # Any answer below 500 means the server is up, even if it rejected the request.
+                if response.status < 500:
+                    circuit_breaker.record_success(self.key)
+                response.raise_for_status()
+                if "application/json" in response.headers.get("Content-Type", ""):
+                    return await response.json()
+                return await response.text()
+        except aiohttp.ClientResponseError as e:
+            if e.status >= 500:
+                circuit_breaker.record_failure(self.key, e)
+            return {"error": f"Client error {e.status}: {e.message}"}
+        except aiohttp.ClientConnectionError as e:
+            circuit_breaker.record_failure(self.key, e)
+            return {"error": "Connection error"}
+        except asyncio.TimeoutError as e:
+            circuit_breaker.record_failure(self.key, e)
+            return {"error": "Request timeout"}
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            circuit_breaker.release(self.key)
+
+    async def fetch(self, url):
+        return await self._request("GET", url)
+
+    async def post(self, endpoint, payload=None):
+        return await self._request("POST", f"{self.server_url}{endpoint}", payload)
+
+class APIClientPool:
+    def __init__(self, limit: int = 100, limit_per_host: int = 4, keepalive_timeout: int = 30, connect_timeout: float = 5, total_timeout: float = 15):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.clients: Dict[Tuple[str, int, str], PooledPalworldAPI] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is not None and not self._session.closed:
+            return self._session
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=300
+                )
+                self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            return self._session
+
+    def client(self, host: str, api_port: int, password: str) -> PooledPalworldAPI:
+        key = (host, api_port, password)
+        api = self.clients.get(key)
+        if api is None:
+            api = PooledPalworldAPI(self, f"http://{host}:{api_port}", password, server_key(host, api_port))
+            self.clients[key] = api
+        return api
+
+    def discard(self, host: str, api_port: int, password: str):
+        self.clients.pop((host, api_port, password), None)
+
+    async def close(self):
+        session, self._session = self._session, None
+        self.clients.clear()
+        if session is not None and not session.closed:
+            try:
+                await session.close()
+            except Exception as e:
+                logging.error(f"Error closing API client session: {e}")
+
+api_clients = APIClientPool()
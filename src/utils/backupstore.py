@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Optional
+
+BACKUP_ROOT = os.path.join("data", "backups")
+
+class BackupStore:
+    def __init__(self, name: str, root: str = BACKUP_ROOT):
+        self.root = os.path.join(root, "".join(c if c.isalnum() or c in "-_" else "_" for c in name))
+        self.blob_dir = os.path.join(self.root, "blobs")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.files: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("files", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"files": self.files}, f)
+        os.replace(tmp, self.manifest_path)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def lookup(self, relpath: str, size: int, mtime: int) -> Optional[str]:
+        entry = self.files.get(relpath)
+        if entry and entry["size"] == size and entry["mtime"] == mtime and os.path.exists(self.blob_path(entry["sha256"])):
+            return self.blob_path(entry["sha256"])
+        return None
+
+    def temp_path(self, relpath: str) -> str:
+        return os.path.join(self.root, "incoming", relpath.replace("/", "__"))
+
+    def commit(self, relpath: str, size: int, mtime: int, tmp_path: str) -> str:
+        sha = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        blob = self.blob_path(digest)
+        # Identical content that was merely touched keeps its existing blob.
+        if os.path.exists(blob):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(tmp_path, blob)
+        self.files[relpath] = {"size": size, "mtime": mtime, "sha256": digest}
+        return blob
+
+    def retain(self, relpaths):
+        keep = set(relpaths)
+        self.files = {rel: entry for rel, entry in self.files.items() if rel in keep}
+        referenced = {entry["sha256"] for entry in self.files.values()}
+        for root, _, files in os.walk(self.blob_dir):
+            for name in files:
+                if name not in referenced:
+                    os.remove(os.path.join(root, name))
+        shutil.rmtree(os.path.join(self.root, "incoming"), ignore_errors=True)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+class CircuitOpenError(ConnectionError):
+    pass
+
+class ServerHealth:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = 0
+        self.retry_at = 0.0
+        self.changed_at = time.time()
+        self.down_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.probing = False
+
+    @property
+    def retry_in(self) -> int:
+        return max(0, int(self.retry_at - time.time()))
+
+def server_key(host: str, port: int) -> str:
+    return f"{host}:{port}"
+
+Listener = Callable[[str, ServerHealth], Awaitable[None]]
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, base_backoff: int = 5, max_backoff: int = 300):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.health: Dict[str, ServerHealth] = {}
+        self.listeners: List[Listener] = []
+        self._tasks = set()
+
+    def get(self, key: str) -> ServerHealth:
+        health = self.health.get(key)
+        if health is None:
+            health = self.health[key] = ServerHealth()
+        return health
+
+    def subscribe(self, callback: Listener):
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback: Listener):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _transition(self, key: str, health: ServerHealth, state: str):
+        if health.state == CLOSED:
+            health.down_since = time.time()
+        elif state == CLOSED:
+            health.down_since = None
+        health.state = state
+        health.changed_at = time.time()
+        if state == OPEN:
+            logging.warning(f"Server {key} marked unreachable after {health.failures} failures, next probe in {health.backoff:.0f}s: {health.last_error}")
+        elif state == CLOSED:
+            logging.info(f"Server {key} is reachable again")
+        for callback in list(self.listeners):
+            task = asyncio.create_task(callback(key, health))
+            self._tasks.add(task)
+            task.add_done_callback(self._listener_done)
+
+    def _listener_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logging.error(f"Circuit breaker listener failed: {task.exception()}")
+
+    def is_open(self, key: str) -> bool:
+        health = self.health.get(key)
+        if health is None or health.state == CLOSED:
+            return False
+        if health.state == OPEN:
+            return time.time() < health.retry_at
+        return health.probing
+
+    def acquire(self, key: str):
+        health = self.get(key)
+        if health.state == OPEN and time.time() >= health.retry_at:
+            self._transition(key, health, HALF_OPEN)
+        if health.state == CLOSED:
+            return
+        if health.state == HALF_OPEN and not health.probing:
+            health.probing = True
+            return
+        raise CircuitOpenError(f"Server {key} is unreachable ({self.describe(key)})")
+
+    def release(self, key: str):
+        health = self.health.get(key)
+        if health:
+            health.probing = False
+
+    def record_success(self, key: str):
+        health = self.get(key)
+        health.failures = 0
+        health.backoff = 0
+        health.probing = False
+        if health.state != CLOSED:
+            self._transition(key, health, CLOSED)
+
+    def record_failure(self, key: str, error):
+        health = self.get(key)
+        health.failures += 1
+        health.last_error = str(error) or type(error).__name__
+        health.probing = False
+        if health.state == HALF_OPEN or (health.state == CLOSED and health.failures >= self.failure_threshold):
+            health.backoff = min(self.max_backoff, health.backoff * 2 if health.backoff else self.base_backoff)
+            # Jitter keeps servers that dropped together from being probed in lockstep.
+            health.retry_at = time.time() + health.backoff * random.uniform(0.8, 1.2)
+            self._transition(key, health, OPEN)
+
+    def describe(self, key: str) -> str:
+        health = self.health.get(key)
+        if health is None or health.state == CLOSED:
+            return "Online"
+        if health.state == HALF_OPEN:
+            return "Reconnecting"
+        return f"Offline since <t:{int(health.down_since or health.changed_at)}:R>, next check in {health.retry_in}s"
+
+circuit_breaker = CircuitBreaker()
@@ -1,16 +1,7 @@
-import aiosqlite
-import os
+from utils.dbpool import db_pool
+from utils.serverregistry import server_registry
 import datetime
-
-DATABASE_PATH = os.path.join('data', 'palworld.db')
-
-async def db_connection():
-    conn = None
-    try:
-        conn = await aiosqlite.connect(DATABASE_PATH)
-    except aiosqlite.Error as e:
-        print(e)
-    return conn
+import logging
 
 async def initialize_db():
     commands = [
@@ -89,6 +80,16 @@ async def initialize_db():
             session_start TIMESTAMP,
             last_session INTEGER NOT NULL DEFAULT 0
         )""",
+        """CREATE TABLE IF NOT EXISTS active_sessions (
+            guild_id INTEGER NOT NULL,
+            server_name TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            session_start REAL NOT NULL,
+            last_seen REAL NOT NULL,
+            PRIMARY KEY (guild_id, server_name, user_id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_active_sessions_last_seen ON active_sessions (last_seen)",
+        "CREATE INDEX IF NOT EXISTS idx_active_sessions_user ON active_sessions (user_id, session_start)",
         """CREATE TABLE IF NOT EXISTS link_codes (
             discord_id INTEGER PRIMARY KEY,
             code TEXT NOT NULL,
@@ -106,389 +107,367 @@ async def initialize_db():
             gold INTEGER DEFAULT 0,
             last_work TIMESTAMP,
             PRIMARY KEY (discord_id, guild_id)
-        )"""
+        )""",
+        """CREATE TABLE IF NOT EXISTS deliveries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            server_name TEXT NOT NULL,
+            discord_id INTEGER,
+            kind TEXT NOT NULL,
+            label TEXT NOT NULL,
+            commands TEXT NOT NULL,
+            progress INTEGER NOT NULL DEFAULT 0,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            refund INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            last_error TEXT,
+            next_attempt REAL NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (status, next_attempt)"
     ]
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
+    async with db_pool.writer() as conn:
         for command in commands:
-            await cursor.execute(command)
+            await conn.execute(command)
         try:
-            await cursor.execute("ALTER TABLE servers ADD COLUMN rcon_port INTEGER")
+            await conn.execute("ALTER TABLE servers ADD COLUMN rcon_port INTEGER")
         except:
             pass
-        await conn.commit()
-        await conn.close()
+        await _initialize_player_search(conn)
+
+# Player Search
+# players_fts is an external-content trigram index over the players table, so any
+# substring of 3+ characters is a posting lookup instead of a LIKE '%x%' table scan.
+PLAYER_SEARCH_FTS = False
+
+async def _initialize_player_search(conn):
+    global PLAYER_SEARCH_FTS
+    cursor = await conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'players_fts'")
+    existed = await cursor.fetchone() is not None
+    try:
+        await conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS players_fts USING fts5(
+                name, account_name, user_id,
+                content='players', content_rowid='rowid', tokenize='trigram'
+            )
+        """)
+    except Exception as e:
+        logging.warning(f"FTS5 trigram index unavailable, player search falls back to LIKE: {e}")
+        PLAYER_SEARCH_FTS = False
+        return
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS players_fts_insert AFTER INSERT ON players BEGIN
+            INSERT INTO players_fts (rowid, name, account_name, user_id)
+            VALUES (new.rowid, new.name, new.account_name, new.user_id);
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS players_fts_delete AFTER DELETE ON players BEGIN
+            INSERT INTO players_fts (players_fts, rowid, name, account_name, user_id)
+            VALUES ('delete', old.rowid, old.name, old.account_name, old.user_id);
+        END
+    """)
+    await conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS players_fts_update AFTER UPDATE OF name, account_name, user_id ON players
+        WHEN old.name IS NOT new.name OR old.account_name IS NOT new.account_name OR old.user_id IS NOT new.user_id
+        BEGIN
+            INSERT INTO players_fts (players_fts, rowid, name, account_name, user_id)
+            VALUES ('delete', old.rowid, old.name, old.account_name, old.user_id);
+            INSERT INTO players_fts (rowid, name, account_name, user_id)
+            VALUES (new.rowid, new.name, new.account_name, new.user_id);
+        END
+    """)
+    if not existed:
+        await conn.execute("INSERT INTO players_fts (players_fts) VALUES ('rebuild')")
+    PLAYER_SEARCH_FTS = True
+
+async def search_players(query: str, limit: int = 25):
+    query = (query or "").strip()
+    async with db_pool.reader() as conn:
+        if PLAYER_SEARCH_FTS and len(query) >= 3:
+            # Quoted as a single phrase so user input is never parsed as FTS syntax.
+            phrase = '"' + query.replace('"', '""') + '"'
+            cursor = await conn.execute("""
+                SELECT p.user_id, p.name, p.account_name
+                FROM players_fts f JOIN players p ON p.rowid = f.rowid
+                WHERE players_fts MATCH ?
+                ORDER BY bm25(players_fts, 10.0, 5.0, 1.0)
+                LIMIT ?
+            """, (phrase, limit))
+        elif query:
+            cursor = await conn.execute("""
+                SELECT user_id, name, account_name FROM players
+                WHERE name LIKE ? OR account_name LIKE ? OR user_id LIKE ?
+                LIMIT ?
+            """, (f'{query}%', f'{query}%', f'%{query}%', limit))
+        else:
+            cursor = await conn.execute("SELECT user_id, name, account_name FROM players LIMIT ?", (limit,))
+        return await cursor.fetchall()
+
+PLAYER_COLUMNS = ('name', 'account_name', 'player_id', 'ip', 'ping', 'location_x', 'location_y', 'level')
+
+def _player_row(player):
+    return (
+        player['userId'],
+        player['name'],
+        player['accountName'],
+        player['playerId'],
+        player['ip'],
+        player['ping'],
+        player['location_x'],
+        player['location_y'],
+        player['level']
+    )
 
 async def add_player(player):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("""
-            INSERT OR REPLACE INTO players (user_id, name, account_name, player_id, ip, ping, location_x, location_y, level)
+    await add_players([player])
+
+async def add_players(players):
+    rows = {}
+    for player in players:
+        rows[player['userId']] = _player_row(player)
+    if not rows:
+        return
+    # Upsert only touches a row when one of its columns actually changed.
+    assignments = ", ".join(f"{col} = excluded.{col}" for col in PLAYER_COLUMNS)
+    changed = " OR ".join(f"players.{col} IS NOT excluded.{col}" for col in PLAYER_COLUMNS)
+    async with db_pool.writer() as conn:
+        await conn.executemany(f"""
+            INSERT INTO players (user_id, name, account_name, player_id, ip, ping, location_x, location_y, level)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            player['userId'],
-            player['name'],
-            player['accountName'],
-            player['playerId'],
-            player['ip'],
-            player['ping'],
-            player['location_x'],
-            player['location_y'],
-            player['level']
-        ))
-        await conn.commit()
-        await conn.close()
+            ON CONFLICT(user_id) DO UPDATE SET {assignments}
+            WHERE {changed}
+        """, list(rows.values()))
 
 async def fetch_player(user_id):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT * FROM players WHERE user_id = ?", (user_id,))
-        player = await cursor.fetchone()
-        await conn.close()
-        return player
-
-async def player_autocomplete(current):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT user_id, name FROM players WHERE name LIKE ?", (f'%{current}%',))
-        players = await cursor.fetchall()
-        await conn.close()
-        return [(player[0], player[1]) for player in players]
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT * FROM players WHERE user_id = ?", (user_id,))
+        return await cursor.fetchone()
+
+async def player_autocomplete(current, limit: int = 25):
+    players = await search_players(current, limit)
+    return [(player[0], player[1]) for player in players]
 
 async def fetch_all_servers():
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT * FROM servers")
-        servers = await cursor.fetchall()
-        await conn.close()
-        return servers
+    return await server_registry.all()
 
 async def add_server(guild_id, server_name, host, password, api_port, rcon_port):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("INSERT INTO servers (guild_id, server_name, host, password, api_port, rcon_port) VALUES (?, ?, ?, ?, ?, ?)",
+    async with db_pool.writer() as conn:
+        await conn.execute("INSERT INTO servers (guild_id, server_name, host, password, api_port, rcon_port) VALUES (?, ?, ?, ?, ?, ?)",
                        (guild_id, server_name, host, password, api_port, rcon_port))
-        await conn.commit()
-        await conn.close()
+    server_registry.invalidate()
 
 async def fetch_server_details(guild_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT guild_id, server_name, host, password, api_port, rcon_port FROM servers WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
-        server_details = await cursor.fetchone()
-        await conn.close()
-        return server_details
+    return await server_registry.get(guild_id, server_name)
 
 async def remove_server(guild_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("DELETE FROM servers WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
-        await conn.commit()
-        await conn.close()
+    async with db_pool.writer() as conn:
+        await conn.execute("DELETE FROM servers WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
+    server_registry.invalidate()
 
 async def remove_whitelist_status(guild_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("DELETE FROM whitelist_status WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
-        await conn.commit()
-        await conn.close()
+    async with db_pool.writer() as conn:
+        await conn.execute("DELETE FROM whitelist_status WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
 
 async def server_autocomplete(guild_id, current):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT server_name FROM servers WHERE guild_id = ? AND server_name LIKE ?", (guild_id, f'%{current}%'))
-        servers = await cursor.fetchall()
-        await conn.close()
-        return [server[0] for server in servers]
+    return await server_registry.autocomplete(guild_id, current)
     
 # Server Logs
 async def add_logchannel(guild_id, channel_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             INSERT OR REPLACE INTO server_logs (guild_id, channel_id, server_name)
             VALUES (?, ?, ?)
         """, (guild_id, channel_id, server_name))
-        await conn.commit()
-        await conn.close()
 
 async def remove_logchannel(guild_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("DELETE FROM server_logs WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
-        await conn.commit()
-        await conn.close()
+    async with db_pool.writer() as conn:
+        await conn.execute("DELETE FROM server_logs WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
 
 async def fetch_logchannel(guild_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT channel_id FROM server_logs WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT channel_id FROM server_logs WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
         result = await cursor.fetchone()
-        await conn.close()
         return result[0] if result else None
     
 # Query Server
 async def add_query(guild_id, channel_id, server_name, message_id, player_message_id):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             INSERT OR REPLACE INTO query_logs (guild_id, channel_id, server_name, message_id, player_message_id)
             VALUES (?, ?, ?, ?, ?)
         """, (guild_id, channel_id, server_name, message_id, player_message_id))
-        await conn.commit()
-        await conn.close()
 
 async def fetch_query(guild_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("""
             SELECT channel_id, message_id, player_message_id
             FROM query_logs
             WHERE guild_id = ? AND server_name = ?
         """, (guild_id, server_name))
         result = await cursor.fetchone()
-        await conn.close()
         return result if result else None
 
 async def delete_query(guild_id, server_name):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("DELETE FROM query_logs WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
-        await conn.commit()
-        await conn.close()
+    async with db_pool.writer() as conn:
+        await conn.execute("DELETE FROM query_logs WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
 
 # Status Tracking
 async def set_tracking(guild_id, enabled: bool):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             INSERT OR REPLACE INTO player_tracking (guild_id, enabled) VALUES (?, ?)
         """, (guild_id, enabled))
-        await conn.commit()
-        await conn.close()
 
 async def get_tracking():
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT guild_id FROM player_tracking WHERE enabled = 1")
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT guild_id FROM player_tracking WHERE enabled = 1")
         rows = await cursor.fetchall()
-        await conn.close()
         return [row[0] for row in rows]
     
 # Chat Relay/Feed  
 async def set_chat(guild_id, server_name, chat_channel_id, log_path, webhook_url):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             INSERT OR REPLACE INTO chat_settings (
                 guild_id, server_name, log_channel_id, log_path, webhook_url
             ) VALUES (?, ?, ?, ?, ?)
         """, (guild_id, server_name, chat_channel_id, log_path, webhook_url))
-        await conn.commit()
-        await conn.close()
 
 async def get_chat(guild_id):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("""
             SELECT server_name, log_channel_id, log_path, webhook_url
             FROM chat_settings WHERE guild_id = ?
         """, (guild_id,))
-        result = await cursor.fetchall()
-        await conn.close()
-        return result
+        return await cursor.fetchall()
 
 async def delete_chat(guild_id, server_name):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("DELETE FROM chat_settings WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
-        await conn.commit()
-        await conn.close()
+    async with db_pool.writer() as conn:
+        await conn.execute("DELETE FROM chat_settings WHERE guild_id = ? AND server_name = ?", (guild_id, server_name))
 
 # Backups
 async def set_backup(guild_id, server_name, path, channel_id, interval_minutes):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             INSERT OR REPLACE INTO backups (guild_id, server_name, path, channel_id, interval_minutes)
             VALUES (?, ?, ?, ?, ?)
         """, (guild_id, server_name, path, channel_id, interval_minutes))
-        await conn.commit()
-        await conn.close()
 
 async def all_backups():
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("""
             SELECT guild_id, server_name, path, channel_id, interval_minutes
             FROM backups
         """)
-        rows = await cursor.fetchall()
-        await conn.close()
-        return rows
+        return await cursor.fetchall()
 
 async def del_backup(guild_id, server_name):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             DELETE FROM backups
             WHERE guild_id = ? AND server_name = ?
         """, (guild_id, server_name))
-        await conn.commit()
-        await conn.close()
 
 # Player Time Tracking
 SESSION_TIMEOUT_SECONDS = 300
 
-async def track_sessions(current_online: set, previous_online: set, timestamp: str):
-    conn = await db_connection()
-    if not conn:
-        return
-
-    cursor = await conn.cursor()
-    now = datetime.datetime.fromisoformat(timestamp)
-
-    newly_joined = current_online - previous_online
-    for uid in newly_joined:
-        await cursor.execute("SELECT session_start, total_time FROM player_sessions WHERE user_id = ?", (uid,))
-        row = await cursor.fetchone()
-        if row is None:
-            await cursor.execute(
-                "INSERT INTO player_sessions (user_id, total_time, session_start, last_session) VALUES (?, 0, ?, 0)",
-                (uid, timestamp)
-            )
-        else:
-            await cursor.execute(
-                "UPDATE player_sessions SET session_start = ? WHERE user_id = ?",
-                (timestamp, uid)
-            )
-
-    disconnected = previous_online - current_online
-    for uid in disconnected:
-        await cursor.execute("SELECT session_start, total_time FROM player_sessions WHERE user_id = ?", (uid,))
-        row = await cursor.fetchone()
-        if row and row[0]:
-            dt_start = datetime.datetime.fromisoformat(row[0])
-            delta = int((now - dt_start).total_seconds())
-            new_total = row[1] + delta
-            await cursor.execute(
-                "UPDATE player_sessions SET total_time = ?, session_start = NULL, last_session = ? WHERE user_id = ?",
-                (new_total, delta, uid)
-            )
+async def track_sessions(guild_id, server_name, current_online: set, timestamp: str):
+    now = datetime.datetime.fromisoformat(timestamp).timestamp()
+    cutoff = now - SESSION_TIMEOUT_SECONDS
+    # A session ends when its player leaves this server's roster, or when nobody has
+    # seen it for SESSION_TIMEOUT_SECONDS (server unreachable, removed or bot offline).
+    closing = """
+        (guild_id = :guild AND server_name = :server AND user_id NOT IN (SELECT user_id FROM temp.online_now))
+        OR last_seen < :cutoff
+    """
+    params = {"guild": guild_id, "server": server_name, "now": now, "cutoff": cutoff}
+    async with db_pool.writer() as conn:
+        await conn.execute("CREATE TEMP TABLE IF NOT EXISTS online_now (user_id TEXT PRIMARY KEY)")
+        await conn.execute("CREATE TEMP TABLE IF NOT EXISTS closed_sessions (user_id TEXT NOT NULL, duration INTEGER NOT NULL)")
+        await conn.execute("DELETE FROM temp.online_now")
+        await conn.execute("DELETE FROM temp.closed_sessions")
+        await conn.executemany("INSERT OR IGNORE INTO temp.online_now (user_id) VALUES (?)", [(uid,) for uid in current_online])
+
+        await conn.execute(f"""
+            INSERT INTO temp.closed_sessions (user_id, duration)
+            SELECT user_id, CAST(ROUND(MAX(CASE WHEN last_seen < :cutoff THEN last_seen ELSE :now END - session_start, 0)) AS INTEGER)
+            FROM active_sessions WHERE {closing}
+        """, params)
+        await conn.execute(f"DELETE FROM active_sessions WHERE {closing}", params)
+        await conn.execute("""
+            UPDATE player_sessions
+            SET total_time = total_time + (SELECT SUM(duration) FROM temp.closed_sessions c WHERE c.user_id = player_sessions.user_id),
+                last_session = (SELECT MAX(duration) FROM temp.closed_sessions c WHERE c.user_id = player_sessions.user_id)
+            WHERE user_id IN (SELECT user_id FROM temp.closed_sessions)
+        """)
 
-    await cursor.execute(
-        "SELECT user_id, session_start FROM player_sessions WHERE session_start IS NOT NULL"
-    )
-    all_active = await cursor.fetchall()
-    for uid, session_start in all_active:
-        if uid not in current_online:
-            dt_start = datetime.datetime.fromisoformat(session_start)
-            age = int((now - dt_start).total_seconds())
-            if age > SESSION_TIMEOUT_SECONDS:
-                await cursor.execute("SELECT total_time FROM player_sessions WHERE user_id = ?", (uid,))
-                row = await cursor.fetchone()
-                if row:
-                    new_total = row[0] + age
-                    await cursor.execute(
-                        "UPDATE player_sessions SET total_time = ?, session_start = NULL, last_session = ? WHERE user_id = ?",
-                        (new_total, age, uid)
-                    )
-
-    await conn.commit()
-    await conn.close()
+        await conn.execute("""
+            INSERT OR IGNORE INTO player_sessions (user_id, total_time, session_start, last_session)
+            SELECT user_id, 0, NULL, 0 FROM temp.online_now
+        """)
+        await conn.execute("""
+            INSERT INTO active_sessions (guild_id, server_name, user_id, session_start, last_seen)
+            SELECT :guild, :server, user_id, :now, :now FROM temp.online_now WHERE 1
+            ON CONFLICT(guild_id, server_name, user_id) DO UPDATE SET last_seen = excluded.last_seen
+        """, params)
 
 async def get_player_session(user_id: str):
-    conn = await db_connection()
-    if conn is not None:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT user_id, total_time, session_start FROM player_sessions WHERE user_id = ?", (user_id,))
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("""
+            SELECT p.user_id, p.total_time, (SELECT MIN(a.session_start) FROM active_sessions a WHERE a.user_id = p.user_id)
+            FROM player_sessions p WHERE p.user_id = ?
+        """, (user_id,))
         row = await cursor.fetchone()
-        await conn.close()
+        if row and row[2] is not None:
+            started = datetime.datetime.fromtimestamp(row[2], datetime.timezone.utc).isoformat()
+            return row[0], row[1], started
         return row
 
 async def create_link_code(discord_id: int, code: str):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             INSERT OR REPLACE INTO link_codes (discord_id, code, timestamp)
             VALUES (?, ?, CURRENT_TIMESTAMP)
         """, (discord_id, code))
-        await conn.commit()
-        await conn.close()
 
 async def get_link_code(discord_id: int):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT code FROM link_codes WHERE discord_id = ?", (discord_id,))
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT code FROM link_codes WHERE discord_id = ?", (discord_id,))
         row = await cursor.fetchone()
-        await conn.close()
         return row[0] if row else None
 
 async def verify_link_code(code: str):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT discord_id FROM link_codes WHERE code = ?", (code,))
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT discord_id FROM link_codes WHERE code = ?", (code,))
         row = await cursor.fetchone()
-        await conn.close()
         return row[0] if row else None
 
 async def link_player(discord_id: int, player_userid: str, player_name: str):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("""
+    async with db_pool.writer() as conn:
+        await conn.execute("""
             INSERT OR REPLACE INTO linked_players (discord_id, player_userid, player_name, linked_at)
             VALUES (?, ?, ?, CURRENT_TIMESTAMP)
         """, (discord_id, player_userid, player_name))
-        await cursor.execute("DELETE FROM link_codes WHERE discord_id = ?", (discord_id,))
-        await conn.commit()
-        await conn.close()
+        await conn.execute("DELETE FROM link_codes WHERE discord_id = ?", (discord_id,))
 
 async def get_linked_player(discord_id: int):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT player_userid, player_name FROM linked_players WHERE discord_id = ?", (discord_id,))
-        row = await cursor.fetchone()
-        await conn.close()
-        return row
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT player_userid, player_name FROM linked_players WHERE discord_id = ?", (discord_id,))
+        return await cursor.fetchone()
 
 async def get_discord_from_userid(player_userid: str):
-    conn = await db_connection()
-    if conn:
-        cursor = await conn.cursor()
-        await cursor.execute("SELECT discord_id FROM linked_players WHERE player_userid = ?", (player_userid,))
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT discord_id FROM linked_players WHERE player_userid = ?", (player_userid,))
         row = await cursor.fetchone()
-        await conn.close()
         return row[0] if row else None
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(initialize_db())
+
+    async def main():
+        await initialize_db()
+        await db_pool.close()
+
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+import aiosqlite
+
+DATABASE_PATH = os.path.join('data', 'palworld.db')
+
+class DatabasePool:
+    def __init__(self, path: str, readers: int = 4, cache_kib: int = 16384, busy_timeout: int = 5000):
+        self.path = path
+        self.reader_count = max(1, readers)
+        self.cache_kib = cache_kib
+        self.busy_timeout = busy_timeout
+        self._writer = None
+        self._writer_lock = asyncio.Lock()
+        self._readers = None
+        self._all_readers = []
+        self._open_lock = asyncio.Lock()
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.path)
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute(f"PRAGMA cache_size=-{int(self.cache_kib)}")
+        await conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    async def _ensure_open(self):
+        if self._readers is not None:
+            return
+        async with self._open_lock:
+            if self._readers is not None:
+                return
+            # The writer is opened first so WAL mode is set before any reader attaches.
+            self._writer = await self._connect()
+            readers = asyncio.Queue()
+            for _ in range(self.reader_count):
+                conn = await self._connect()
+                self._all_readers.append(conn)
+                readers.put_nowait(conn)
+            self._readers = readers
+
+    @asynccontextmanager
+    async def writer(self):
+        await self._ensure_open()
+        async with self._writer_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
+
+    @asynccontextmanager
+    async def reader(self):
+        await self._ensure_open()
+        conn = await self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def close(self):
+        async with self._open_lock:
+            conns = list(self._all_readers)
+            if self._writer is not None:
+                conns.append(self._writer)
+            self._writer = None
+            self._readers = None
+            self._all_readers = []
+        for conn in conns:
+            try:
+                await conn.close()
+            except Exception:
+                pass
+
+db_pool = DatabasePool(DATABASE_PATH)
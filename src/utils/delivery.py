@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Set, Tuple
+import discord
+from utils.dbpool import db_pool
+from utils.fanout import fan_out
+from utils.rconutility import RconUtility
+from utils.serverregistry import server_registry
+
+DeliveryJob = namedtuple("DeliveryJob", ["id", "guild_id", "server_name", "discord_id", "kind", "label", "commands", "progress", "attempts", "refund"])
+
+JOB_COLUMNS = "id, guild_id, server_name, discord_id, kind, label, commands, progress, attempts, refund"
+
+INSERT_JOB = """
+    INSERT INTO deliveries (guild_id, server_name, discord_id, kind, label, commands, refund, next_attempt)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# A new job waits for its command to call watch(), or for this many seconds if it never does.
+WATCH_GRACE = 10
+
+async def create_delivery(guild_id: int, server_name: str, discord_id: int, kind: str, label: str, commands: List[str]) -> int:
+    async with db_pool.writer() as conn:
+        cursor = await conn.execute(INSERT_JOB, (guild_id, server_name, discord_id, kind, label, json.dumps(commands), 0, time.time() + WATCH_GRACE))
+        return cursor.lastrowid
+
+async def purchase_delivery(discord_id: int, guild_id: int, price: int, server_name: str, label: str, commands: List[str]) -> Tuple[bool, int, Optional[int]]:
+    # Gold leaves the balance in the same transaction that records the job, so neither can be lost without the other.
+    async with db_pool.writer() as conn:
+        cursor = await conn.execute("SELECT gold FROM economy WHERE discord_id = ? AND guild_id = ?", (discord_id, guild_id))
+        row = await cursor.fetchone()
+        current_gold = row[0] if row else 0
+        if current_gold < price:
+            return False, current_gold, None
+        await conn.execute("UPDATE economy SET gold = ? WHERE discord_id = ? AND guild_id = ?", (current_gold - price, discord_id, guild_id))
+        cursor = await conn.execute(INSERT_JOB, (guild_id, server_name, discord_id, "shop", label, json.dumps(commands), price, time.time() + WATCH_GRACE))
+        return True, current_gold - price, cursor.lastrowid
+
+async def due_deliveries(limit: int, ready: List[int]) -> List[DeliveryJob]:
+    placeholders = ", ".join("?" * len(ready))
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute(
+            f"SELECT {JOB_COLUMNS} FROM deliveries WHERE status = 'pending' AND (next_attempt <= ? OR id IN ({placeholders})) ORDER BY id LIMIT ?",
+            (time.time(), *ready, limit)
+        )
+        return [DeliveryJob(*row) for row in await cursor.fetchall()]
+
+async def next_delivery_due() -> Optional[float]:
+    async with db_pool.reader() as conn:
+        cursor = await conn.execute("SELECT MIN(next_attempt) FROM deliveries WHERE status = 'pending'")
+        row = await cursor.fetchone()
+        return row[0] if row else None
+
+async def set_delivery_progress(job_id: int, progress: int):
+    async with db_pool.writer() as conn:
+        await conn.execute("UPDATE deliveries SET progress = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", (progress, job_id))
+
+async def retry_delivery(job_id: int, attempts: int, next_attempt: float, error: str):
+    async with db_pool.writer() as conn:
+        await conn.execute(
+            "UPDATE deliveries SET attempts = ?, next_attempt = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (attempts, next_attempt, error, job_id)
+        )
+
+async def finish_delivery(job: DeliveryJob, status: str, error: Optional[str] = None) -> Tuple[str, int]:
+    async with db_pool.writer() as conn:
+        cursor = await conn.execute("SELECT progress FROM deliveries WHERE id = ?", (job.id,))
+        row = await cursor.fetchone()
+        progress = row[0] if row else job.progress
+        # Only an untouched purchase is refunded; a partial delivery is left for an admin to settle.
+        if status == "failed" and job.refund and progress == 0:
+            await conn.execute(
+                "UPDATE economy SET gold = gold + ? WHERE discord_id = ? AND guild_id = ?",
+                (job.refund, job.discord_id, job.guild_id)
+            )
+            status = "refunded"
+        await conn.execute(
+            "UPDATE deliveries SET status = ?, last_error = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (status, error, job.id)
+        )
+    return status, progress
+
+class DeliveryWorker:
+    def __init__(self, interval: int = 5, concurrency: int = 8, batch_size: int = 50, max_attempts: int = 8, base_backoff: int = 15, max_backoff: int = 600):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.rcon = RconUtility()
+        self.followups: Dict[int, Tuple[discord.Webhook, float]] = {}
+        self.ready: Set[int] = set()
+        self.wakeup = asyncio.Event()
+        self.bot = None
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self, bot):
+        self.bot = bot
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run(bot))
+
+    def watch(self, job_id: int, interaction: discord.Interaction):
+        now = time.monotonic()
+        for stale in [k for k, (_, expires) in self.followups.items() if expires < now]:
+            del self.followups[stale]
+            self.ready.discard(stale)
+        # Interaction tokens stay valid for 15 minutes; later completions fall back to a DM.
+        self.followups[job_id] = (interaction.followup, now + 14 * 60)
+        self.ready.add(job_id)
+        self.wakeup.set()
+
+    async def _run(self, bot):
+        await bot.wait_until_ready()
+        while True:
+            self.wakeup.clear()
+            try:
+                await self.tick()
+                due = await next_delivery_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Delivery worker tick failed: {e}")
+                due = None
+            delay = self.interval if due is None else min(self.interval, max(0, due - time.time()))
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def tick(self):
+        while True:
+            jobs = await due_deliveries(self.batch_size, list(self.ready)[:self.batch_size])
+            if not jobs:
+                return
+            # Jobs for one server share its RCON connection; different servers are delivered concurrently.
+            by_server: Dict[Tuple[int, str], List[DeliveryJob]] = {}
+            for job in jobs:
+                by_server.setdefault((job.guild_id, job.server_name), []).append(job)
+            await fan_out(
+                list(by_server.values()), self._deliver_all, limit=self.concurrency, timeout=None,
+                label=lambda group: f"Deliveries for '{group[0].server_name}'"
+            )
+            if len(jobs) < self.batch_size:
+                return
+
+    async def _deliver_all(self, jobs: List[DeliveryJob]):
+        for job in jobs:
+            self.ready.discard(job.id)
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                logging.error(f"Delivery #{job.id} for '{job.server_name}' failed: {e}")
+                await self._retry(job, str(e))
+
+    async def _retry(self, job: DeliveryJob, error: str):
+        attempts = job.attempts + 1
+        if attempts >= self.max_attempts:
+            await self._finish(job, "failed", error)
+            return
+        backoff = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+        await retry_delivery(job.id, attempts, time.time() + backoff, error)
+
+    async def _deliver(self, job: DeliveryJob):
+        server = await server_registry.get(job.guild_id, job.server_name)
+        if server is None:
+            await self._finish(job, "failed", f"Server '{job.server_name}' no longer exists.")
+            return
+        commands = json.loads(job.commands)
+        progress = job.progress
+
+        # Progress is saved after each answered command. A retry resends the first unanswered one, so it runs twice
+        # if the server ran it but its reply was lost: the bot stopped before saving, the connection dropped, the
+        # read timed out, or the reply was malformed.
+        async def advance(index, result):
+            nonlocal progress
+            if result.ok:
+                progress += 1
+                await set_delivery_progress(job.id, progress)
+
+        results = await self.rcon.rcon_batch(
+            server.host, server.rcon_port, server.password, commands[progress:], on_error="stop", on_result=advance
+        )
+        failed = next((r for r in results if not r.ok), None)
+        if failed is None:
+            await self._finish(job, "done")
+            return
+        await self._retry(job, f"`{failed.command}`: {failed.response}")
+
+    async def _finish(self, job: DeliveryJob, status: str, error: Optional[str] = None):
+        status, progress = await finish_delivery(job, status, error)
+        if status == "done":
+            message = f"Your {job.kind} delivery **{job.label}** on '{job.server_name}' has been delivered."
+        elif status == "refunded":
+            message = f"Your {job.kind} delivery **{job.label}** on '{job.server_name}' could not be delivered and has been refunded.\n{error}"
+        else:
+            message = f"Your {job.kind} delivery **{job.label}** on '{job.server_name}' stopped after {progress} of {len(json.loads(job.commands))} commands. Please contact an admin.\n{error}"
+        await self._notify(job, message)
+
+    async def _notify(self, job: DeliveryJob, message: str):
+        followup, expires = self.followups.pop(job.id, (None, 0))
+        if followup is not None and time.monotonic() < expires:
+            try:
+                await followup.send(message, ephemeral=True)
+                return
+            except discord.HTTPException:
+                pass
+        if not job.discord_id or self.bot is None:
+            return
+        try:
+            user = self.bot.get_user(job.discord_id) or await self.bot.fetch_user(job.discord_id)
+            await user.send(message)
+        except discord.HTTPException as e:
+            logging.info(f"Could not notify {job.discord_id} about delivery #{job.id}: {e}")
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+
+delivery_worker = DeliveryWorker()
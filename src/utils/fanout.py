@@ -0,0 +1,31 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+async def fan_out(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    limit: int = 8,
+    timeout: Optional[float] = 30,
+    label: Callable[[T], str] = str,
+    quiet: tuple = ()
+) -> List[Union[R, BaseException]]:
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T):
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(worker(item), timeout)
+            except asyncio.TimeoutError as e:
+                logging.error(f"{label(item)} timed out after {timeout}s")
+                return e
+            except quiet as e:
+                return e
+            except Exception as e:
+                logging.error(f"{label(item)} failed: {e}")
+                return e
+
+    return await asyncio.gather(*(run(item) for item in items))
@@ -0,0 +1,80 @@
+import json
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+def normalize(text: str) -> str:
+    return " ".join(str(text).casefold().split())
+
+class GameDataIndex:
+    def __init__(self, entries: List[dict], id_key: str = "id", name_key: str = "name", gram: int = 3):
+        self.entries = entries
+        self.id_key = id_key
+        self.name_key = name_key
+        self.gram = gram
+        self.by_value: Dict[str, int] = {}
+        self.exact: Dict[str, List[int]] = {}
+        self.keys: List[Tuple[str, int]] = []
+        self.words: List[Tuple[str, int]] = []
+        self.grams: Dict[str, Set[int]] = {}
+        for index, entry in enumerate(entries):
+            for value in (entry.get(id_key, ""), entry.get(name_key, "")):
+                self.by_value.setdefault(value, index)
+                key = normalize(value)
+                if not key:
+                    continue
+                self.exact.setdefault(key, []).append(index)
+                self.keys.append((key, index))
+                self.words.extend((word, index) for word in key.split(" ")[1:])
+                # Every 1..gram length slice is indexed, so a short query is a single posting lookup.
+                for size in range(1, gram + 1):
+                    for start in range(len(key) - size + 1):
+                        self.grams.setdefault(key[start:start + size], set()).add(index)
+        self.keys.sort()
+        self.words.sort()
+        self.postings = {g: sorted(ids) for g, ids in self.grams.items()}
+
+    @classmethod
+    def load(cls, path: str, collection: str, id_key: str = "id", name_key: str = "name") -> "GameDataIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f).get(collection, []), id_key, name_key)
+
+    def _prefixed(self, keys: List[Tuple[str, int]], query: str):
+        position = bisect_left(keys, (query, -1))
+        while position < len(keys) and keys[position][0].startswith(query):
+            yield keys[position][1]
+            position += 1
+
+    def _containing(self, query: str):
+        if len(query) <= self.gram:
+            yield from self.postings.get(query, ())
+            return
+        grams = [query[i:i + self.gram] for i in range(len(query) - self.gram + 1)]
+        lists = [self.grams.get(g) for g in grams]
+        if not all(lists):
+            return
+        candidates = set.intersection(*sorted(lists, key=len))
+        for index in sorted(candidates):
+            entry = self.entries[index]
+            if query in normalize(entry.get(self.id_key, "")) or query in normalize(entry.get(self.name_key, "")):
+                yield index
+
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        query = normalize(query)
+        if not query:
+            return self.entries[:limit]
+        seen: Dict[int, None] = {}
+        # Exact matches rank first, then prefixes of the whole key, then prefixes of a later word, then any substring.
+        tiers = (self.exact.get(query, ()), self._prefixed(self.keys, query), self._prefixed(self.words, query), self._containing(query))
+        for tier in tiers:
+            for index in tier:
+                seen.setdefault(index)
+                if len(seen) >= limit:
+                    return [self.entries[i] for i in seen]
+        return [self.entries[i] for i in seen]
+
+    def resolve(self, value: str) -> Optional[dict]:
+        index = self.by_value.get(value)
+        if index is None:
+            matches = self.exact.get(normalize(value))
+            index = matches[0] if matches else None
+        return self.entries[index] if index is not None else None
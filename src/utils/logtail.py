@@ -0,0 +1,95 @@
+import time
+from typing import List, Optional, Tuple
+
+HEAD_BYTES = 256
+
+class LogDirectory:
+    def __init__(self, path: str, suffixes: Tuple[str, ...] = (".log", ".txt"), relist_interval: int = 300):
+        self.path = path.rstrip("/")
+        self.suffixes = suffixes
+        self.relist_interval = relist_interval
+        self.mtime = None
+        self.listed_at = 0.0
+        self.active: Optional[str] = None
+
+    async def _relist(self, sftp, dir_mtime):
+        entries = await sftp.listdir_attr(self.path)
+        logs = [e for e in entries if e.filename.endswith(self.suffixes)]
+        self.mtime = dir_mtime
+        self.listed_at = time.monotonic()
+        newest = max(logs, key=lambda e: e.st_mtime) if logs else None
+        self.active = newest.filename if newest else None
+        return newest
+
+    async def newest(self, sftp):
+        # Appends do not touch the directory mtime, so an unchanged mtime means no file was added or removed.
+        dir_mtime = (await sftp.stat(self.path)).st_mtime
+        if self.active is None or dir_mtime != self.mtime or time.monotonic() - self.listed_at > self.relist_interval:
+            return await self._relist(sftp, dir_mtime)
+        try:
+            return await sftp.stat(f"{self.path}/{self.active}")
+        except IOError:
+            return await self._relist(sftp, dir_mtime)
+
+class LogTail:
+    def __init__(self, max_read: int = 1024 * 1024):
+        self.max_read = max_read
+        self.path: Optional[str] = None
+        self.offset = 0
+        self.head = b""
+        self.partial = b""
+
+    async def _same_file(self, sftp, path: str, size: int) -> bool:
+        # SFTP exposes no inode, so the first bytes of the file stand in for its identity.
+        if not self.head:
+            return True
+        if size < len(self.head):
+            return False
+        return await sftp.read(path, 0, len(self.head)) == self.head
+
+    def _start(self, path: str, offset: int):
+        self.path = path
+        self.offset = offset
+        self.head = b""
+        self.partial = b""
+
+    async def _consume(self, sftp, path: str, size: int) -> List[str]:
+        if size <= self.offset:
+            return []
+        end = min(size, self.offset + self.max_read)
+        chunk = await sftp.read(path, self.offset, end)
+        if self.offset == len(self.head) and len(self.head) < HEAD_BYTES:
+            self.head = (self.head + chunk)[:HEAD_BYTES]
+        data = self.partial + chunk
+        self.offset = end
+        chunks = data.split(b"\n")
+        self.partial = chunks.pop()
+        if len(self.partial) > self.max_read:
+            self.partial = b""
+        return [chunk.rstrip(b"\r").decode("utf-8", errors="ignore") for chunk in chunks]
+
+    async def poll(self, sftp, path: str, size: int) -> List[str]:
+        if self.path is None:
+            # The first poll only marks the end of the file; history is not replayed.
+            self._start(path, size)
+            self.head = await sftp.read(path, 0, min(HEAD_BYTES, size))
+            return []
+
+        lines = []
+        if path != self.path:
+            # Drain whatever was appended to the previous file before it rotated out.
+            try:
+                old_size = (await sftp.stat(self.path)).st_size
+                if await self._same_file(sftp, self.path, old_size):
+                    while self.offset < old_size:
+                        lines.extend(await self._consume(sftp, self.path, old_size))
+            except IOError:
+                pass
+            if self.partial:
+                lines.append(self.partial.rstrip(b"\r").decode("utf-8", errors="ignore"))
+            self._start(path, 0)
+        elif size < self.offset or not await self._same_file(sftp, path, size):
+            self._start(path, 0)
+
+        lines.extend(await self._consume(sftp, path, size))
+        return lines
@@ -0,0 +1,186 @@
+import asyncio
+import time
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from utils.apicache import api_cache
+from utils.circuitbreaker import CircuitOpenError
+from utils.serverregistry import server_registry, ServerConfig
+
+class ServerSnapshot:
+    def __init__(self, server: ServerConfig, server_info: dict, server_metrics: dict, player_list: dict, timestamp: float, previous: Optional["ServerSnapshot"] = None):
+        self.server = server
+        self.server_info = server_info or {}
+        self.server_metrics = server_metrics or {}
+        self.player_list = player_list or {"players": []}
+        self.players: List[dict] = self.player_list.get("players", [])
+        self.timestamp = timestamp
+        self.initial = previous is None
+        self.previous_timestamp = previous.timestamp if previous else None
+
+        current = {p["userId"]: p for p in self.players}
+        before = {p["userId"]: p for p in previous.players} if previous else current
+        self.joined: List[dict] = [p for uid, p in current.items() if uid not in before]
+        self.left: List[dict] = [p for uid, p in before.items() if uid not in current]
+
+    @property
+    def key(self) -> Tuple[int, str]:
+        return self.server.guild_id, self.server.server_name
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+    def since(self, previous: Optional["ServerSnapshot"]) -> "ServerSnapshot":
+        # Diffing against what a subscriber last saw keeps joins and leaves from skipped snapshots.
+        if previous is None or previous.timestamp == self.previous_timestamp:
+            return self
+        if previous.server != self.server:
+            previous = None
+        return ServerSnapshot(self.server, self.server_info, self.server_metrics, self.player_list, self.timestamp, previous)
+
+Subscriber = Callable[[ServerSnapshot], Awaitable[None]]
+
+class ServerPoller:
+    def __init__(self, interval: int = 10, concurrency: int = 8, fetch_timeout: float = 20, publish_timeout: float = 60, max_backlog: int = 5):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.fetch_timeout = fetch_timeout
+        self.publish_timeout = publish_timeout
+        self.max_backlog = max_backlog
+        self.subscribers: Dict[str, Tuple[Subscriber, int]] = {}
+        self.last_delivery: Dict[Tuple[str, Tuple[int, str]], float] = {}
+        self.last_sent: Dict[Tuple[str, Tuple[int, str]], ServerSnapshot] = {}
+        self.latest: Dict[Tuple[int, str], ServerSnapshot] = {}
+        self.polls: Dict[Tuple[int, str], asyncio.Task] = {}
+        self.deliveries: Dict[Tuple[str, Tuple[int, str]], asyncio.Task] = {}
+        self.backlog: Dict[Tuple[str, Tuple[int, str]], int] = {}
+        self.fetch_slots = asyncio.Semaphore(concurrency)
+        self.delivery_slots: Dict[str, asyncio.Semaphore] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self, name: str, callback: Subscriber, interval: int = 0):
+        self.subscribers[name] = (callback, interval)
+
+    def unsubscribe(self, name: str):
+        self.subscribers.pop(name, None)
+        for key in [k for k in self.last_delivery if k[0] == name]:
+            del self.last_delivery[key]
+        for key in [k for k in self.last_sent if k[0] == name]:
+            del self.last_sent[key]
+
+    def start(self, bot):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run(bot))
+
+    async def _run(self, bot):
+        await bot.wait_until_ready()
+        while True:
+            started = time.monotonic()
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Server poller tick failed: {e}")
+            await asyncio.sleep(max(1, self.interval - (time.monotonic() - started)))
+
+    async def tick(self) -> List[asyncio.Task]:
+        servers = await server_registry.all()
+        keys = {(s.guild_id, s.server_name) for s in servers}
+        for key in [k for k in self.latest if k not in keys]:
+            del self.latest[key]
+        for key in [k for k in self.polls if k not in keys]:
+            self.polls.pop(key).cancel()
+        for state in (self.last_delivery, self.last_sent):
+            for key in [k for k in state if k[1] not in keys]:
+                del state[key]
+
+        # Every server polls on its own task, so a slow or blackholed host only delays itself.
+        started = []
+        for server in servers:
+            key = (server.guild_id, server.server_name)
+            running = self.polls.get(key)
+            if running is not None and not running.done():
+                continue
+            task = asyncio.create_task(self._poll_server(server))
+            self.polls[key] = task
+            started.append(task)
+        return started
+
+    async def _poll_server(self, server: ServerConfig):
+        label = f"Polling '{server.server_name}'"
+        async with self.fetch_slots:
+            try:
+                snapshot = await asyncio.wait_for(self._poll(server), self.fetch_timeout)
+            except asyncio.TimeoutError:
+                logging.error(f"{label} timed out after {self.fetch_timeout}s")
+                return
+            except CircuitOpenError:
+                return
+            except Exception as e:
+                logging.error(f"{label} failed: {e}")
+                return
+        if snapshot is not None:
+            self._publish(snapshot)
+
+    async def _poll(self, server: ServerConfig) -> Optional[ServerSnapshot]:
+        key = (server.guild_id, server.server_name)
+        cached = await api_cache.get_snapshot(server.host, server.api_port, server.password)
+        previous = self.latest.get(key)
+        if previous is not None and previous.server == server and cached.timestamp == previous.timestamp:
+            return None
+        # A changed host/port/password is a different server, so its roster starts fresh.
+        if previous is not None and previous.server != server:
+            previous = None
+        snapshot = ServerSnapshot(server, cached.server_info, cached.server_metrics, cached.player_list, cached.timestamp, previous)
+        self.latest[key] = snapshot
+        return snapshot
+
+    def _publish(self, snapshot: ServerSnapshot):
+        now = time.time()
+        for name, (callback, interval) in list(self.subscribers.items()):
+            delivery_key = (name, snapshot.key)
+            if interval and now - self.last_delivery.get(delivery_key, 0) < interval:
+                continue
+            if self.backlog.get(delivery_key, 0) >= self.max_backlog:
+                logging.warning(f"Subscriber '{name}' is {self.max_backlog} snapshots behind for '{snapshot.server.server_name}', dropping one")
+                continue
+            self.last_delivery[delivery_key] = now
+            self.backlog[delivery_key] = self.backlog.get(delivery_key, 0) + 1
+            delivered = snapshot.since(self.last_sent.get(delivery_key))
+            self.last_sent[delivery_key] = delivered
+            # Deliveries run detached from polling; each one waits for the previous so a subscriber sees a server's snapshots in order.
+            task = asyncio.create_task(self._deliver(delivery_key, callback, delivered, self.deliveries.get(delivery_key)))
+            self.deliveries[delivery_key] = task
+            task.add_done_callback(lambda t, k=delivery_key: self.deliveries.pop(k) if self.deliveries.get(k) is t else None)
+
+    async def _deliver(self, delivery_key, callback: Subscriber, snapshot: ServerSnapshot, previous: Optional[asyncio.Task]):
+        label = f"Subscriber '{delivery_key[0]}' for '{snapshot.server.server_name}'"
+        try:
+            if previous is not None and not previous.done():
+                await asyncio.wait({previous})
+            # Slots are per subscriber, so one that hangs cannot starve the others.
+            async with self.delivery_slots.setdefault(delivery_key[0], asyncio.Semaphore(self.concurrency)):
+                await asyncio.wait_for(callback(snapshot), self.publish_timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"{label} timed out after {self.publish_timeout}s")
+        except Exception as e:
+            logging.error(f"{label} failed: {e}")
+        finally:
+            remaining = self.backlog.get(delivery_key, 1) - 1
+            if remaining > 0:
+                self.backlog[delivery_key] = remaining
+            else:
+                self.backlog.pop(delivery_key, None)
+
+    async def close(self):
+        tasks = [t for t in (self.task, *self.polls.values(), *self.deliveries.values()) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+        self.polls.clear()
+        self.deliveries.clear()
+        self.backlog.clear()
+
+server_poller = ServerPoller(interval=10)
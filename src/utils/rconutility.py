@@ -1,17 +1,174 @@
 import asyncio
+import logging
+import struct
+import time
+from collections import namedtuple
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 from gamercon_async import GameRCON, ClientError, TimeoutError, InvalidPassword
 
+RconResult = namedtuple("RconResult", ["command", "response", "ok", "elapsed"])
+
+RCON_ERRORS = (ClientError, TimeoutError, InvalidPassword, asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError)
+
+def describe_error(e: Exception) -> str:
+    if isinstance(e, (ClientError, TimeoutError, InvalidPassword)):
+        return f"RCON error: {e}"
+    if isinstance(e, asyncio.TimeoutError):
+        return "Timed out."
+    return f"Connection reset: {e}"
+
+class PooledRCON(GameRCON):
+    received = 0
+
+    async def send(self, cmd: str) -> str:
+        self.received = 0
+        try:
+            return await super().send(cmd)
+        except struct.error as e:
+            raise ClientError(f"Malformed response - {e}")
+
+    def unanswered(self, e: Exception) -> bool:
+        # Only a connection that closed before any byte of the reply arrived can be sent on again without running the command twice.
+        if isinstance(e, asyncio.IncompleteReadError):
+            return self.received == 0 and not e.partial
+        return self.received == 0 and isinstance(e, ConnectionError)
+
+    async def _read_data(self, leng: int) -> bytes:
+        # A short read would leave the rest of the packet in the stream and desync every later response.
+        try:
+            data = await asyncio.wait_for(self._reader.readexactly(leng), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Timeout while reading data from server")
+        self.received += len(data)
+        return data
+
+class RconConnection:
+    def __init__(self, host: str, port: int, password: str, timeout: int):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.rcon: Optional[PooledRCON] = None
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def _alive(self) -> bool:
+        # The server closing an idle connection shows up as EOF on the reader without any round trip.
+        rcon = self.rcon
+        return rcon is not None and rcon._writer is not None and not rcon._writer.is_closing() and not rcon._reader.at_eof()
+
+    async def _connect(self):
+        await self._drop()
+        rcon = PooledRCON(self.host, self.port, self.password, self.timeout)
+        await rcon.__aenter__()
+        self.rcon = rcon
+
+    async def _drop(self):
+        rcon, self.rcon = self.rcon, None
+        if rcon is not None:
+            try:
+                await asyncio.wait_for(rcon.__aexit__(None, None, None), 5)
+            except Exception:
+                pass
+
+    async def _send(self, command: str) -> str:
+        self.last_used = time.monotonic()
+        reused = self._alive()
+        if not reused:
+            await self._connect()
+        try:
+            return await self.rcon.send(command)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            # Only a reused connection the server dropped while idle is retried, and only if nothing came back.
+            retry = reused and self.rcon.unanswered(e)
+            await self._drop()
+            if not retry:
+                raise
+        except BaseException:
+            await self._drop()
+            raise
+        await self._connect()
+        try:
+            return await self.rcon.send(command)
+        except BaseException:
+            await self._drop()
+            raise
+        finally:
+            self.last_used = time.monotonic()
+
+    async def send(self, command: str) -> str:
+        async with self.lock:
+            return await self._send(command)
+
+    async def batch(self, commands: List[str], on_error: str = "stop", max_pace: float = 1.0, on_result: Optional[Callable[[int, RconResult], Awaitable[None]]] = None) -> List[RconResult]:
+        results = []
+        rtt = None
+        async with self.lock:
+            for index, command in enumerate(commands):
+                if rtt is not None:
+                    # Pausing for about as long as the server took to answer keeps a busy server from being flooded.
+                    await asyncio.sleep(min(max_pace, rtt))
+                started = time.monotonic()
+                try:
+                    results.append(RconResult(command, await self._send(command), True, time.monotonic() - started))
+                except RCON_ERRORS as e:
+                    results.append(RconResult(command, describe_error(e), False, time.monotonic() - started))
+                if on_result:
+                    await on_result(index, results[-1])
+                if not results[-1].ok and on_error == "stop":
+                    results.extend(RconResult(rest, "Skipped.", False, 0.0) for rest in commands[index + 1:])
+                    break
+                elapsed = results[-1].elapsed
+                rtt = elapsed if rtt is None else rtt * 0.7 + elapsed * 0.3
+        return results
+
+    async def close_if_idle(self, idle_timeout: int) -> bool:
+        if self.rcon is not None and not self.lock.locked() and time.monotonic() - self.last_used > idle_timeout:
+            async with self.lock:
+                await self._drop()
+            return True
+        return False
+
+    async def close(self):
+        async with self.lock:
+            await self._drop()
+
+class RconPool:
+    def __init__(self, idle_timeout: int = 120):
+        self.idle_timeout = idle_timeout
+        self.connections: Dict[Tuple[str, int], RconConnection] = {}
+
+    async def connection(self, host: str, port: int, password: str, timeout: int = 30) -> RconConnection:
+        key = (host, int(port))
+        conn = self.connections.get(key)
+        if conn is None or conn.password != password or conn.timeout != timeout:
+            if conn:
+                await conn.close()
+            conn = RconConnection(host, int(port), password, timeout)
+            self.connections[key] = conn
+        for other_key, other in list(self.connections.items()):
+            if other is not conn and await other.close_if_idle(self.idle_timeout):
+                logging.info(f"[{other_key[0]}:{other_key[1]}] closed idle RCON connection")
+        return conn
+
+    async def close(self):
+        connections = list(self.connections.values())
+        self.connections.clear()
+        await asyncio.gather(*(c.close() for c in connections), return_exceptions=True)
+
+rcon_pool = RconPool()
+
 class RconUtility:
     def __init__(self, timeout=30):
         self.timeout = timeout
 
     async def rcon_command(self, host: str, port: int, password: str, command: str):
         try:
-            async with GameRCON(host, port, password, self.timeout) as rcon:
-                return await rcon.send(command)
-        except (ClientError, TimeoutError, InvalidPassword) as e:
-            return f"RCON error: {e}"
-        except asyncio.TimeoutError:
-            return "Timed out."
-        except ConnectionResetError as e:
-            return f"Connection reset: {e}"
+            conn = await rcon_pool.connection(host, port, password, self.timeout)
+            return await conn.send(command)
+        except RCON_ERRORS as e:
+            return describe_error(e)
+
+    async def rcon_batch(self, host: str, port: int, password: str, commands: List[str], on_error: str = "stop", on_result: Optional[Callable[[int, RconResult], Awaitable[None]]] = None) -> List[RconResult]:
+        conn = await rcon_pool.connection(host, port, password, self.timeout)
+        return await conn.batch(commands, on_error, on_result=on_result)
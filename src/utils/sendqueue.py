@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict
+import discord
+
+class TokenBucket:
+    def __init__(self, capacity: int, per: float):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def defer(self, seconds: float):
+        # Called after a 429 so the next send waits out Discord's own retry_after.
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+        self.updated = time.monotonic()
+
+class SendQueue:
+    def __init__(self, capacity: int = 5, per: float = 5.0, max_retries: int = 3, idle_timeout: float = 60):
+        self.capacity = capacity
+        self.per = per
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        self.queues: Dict[int, asyncio.Queue] = {}
+        self.buckets: Dict[int, TokenBucket] = {}
+        self.workers: Dict[int, asyncio.Task] = {}
+
+    def submit(self, channel_id: int, action: Callable[[], Awaitable], label: str = "") -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        # Fire-and-forget callers never await the future; errors are logged by the worker.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.queues.setdefault(channel_id, asyncio.Queue()).put_nowait((action, future, label))
+        worker = self.workers.get(channel_id)
+        if worker is None or worker.done():
+            self.workers[channel_id] = asyncio.create_task(self._worker(channel_id))
+        return future
+
+    def send(self, channel: discord.abc.Messageable, label: str = "", **kwargs) -> asyncio.Future:
+        return self.submit(channel.id, lambda: channel.send(**kwargs), label)
+
+    def edit(self, channel_id: int, message: discord.Message, label: str = "", **kwargs) -> asyncio.Future:
+        return self.submit(channel_id, lambda: message.edit(**kwargs), label)
+
+    async def _worker(self, channel_id: int):
+        queue = self.queues[channel_id]
+        bucket = self.buckets.setdefault(channel_id, TokenBucket(self.capacity, self.per))
+        try:
+            while True:
+                try:
+                    action, future, label = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    return
+                if future.cancelled():
+                    continue
+                await self._run(bucket, action, future, label or str(channel_id))
+        finally:
+            if self.workers.get(channel_id) is asyncio.current_task():
+                del self.workers[channel_id]
+                if queue.empty():
+                    self.queues.pop(channel_id, None)
+                    self.buckets.pop(channel_id, None)
+
+    async def _run(self, bucket: TokenBucket, action: Callable[[], Awaitable], future: asyncio.Future, label: str):
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            try:
+                result = await action()
+            except (discord.RateLimited, discord.HTTPException) as e:
+                retry_after = getattr(e, "retry_after", None)
+                if isinstance(e, discord.HTTPException) and e.status != 429 or attempt == self.max_retries:
+                    # A deleted message or channel is expected; callers that care handle NotFound.
+                    if not isinstance(e, discord.NotFound):
+                        logging.error(f"Failed to deliver message to {label}: {e}")
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+                bucket.defer(retry_after or self.per)
+                continue
+            except Exception as e:
+                logging.error(f"Failed to deliver message to {label}: {e}")
+                if not future.done():
+                    future.set_exception(e)
+                return
+            if not future.done():
+                future.set_result(result)
+            return
+
+    async def close(self):
+        tasks = list(self.workers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers.clear()
+        self.queues.clear()
+        self.buckets.clear()
+
+send_queue = SendQueue()
@@ -0,0 +1,68 @@
+import asyncio
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+from utils.dbpool import db_pool
+from utils.apiclient import api_clients, PooledPalworldAPI
+
+ServerConfig = namedtuple("ServerConfig", ["guild_id", "server_name", "host", "password", "api_port", "rcon_port"])
+
+class ServerRegistry:
+    def __init__(self):
+        self.servers: Dict[Tuple[int, str], ServerConfig] = {}
+        self.by_guild: Dict[int, List[ServerConfig]] = {}
+        self.loaded = False
+        self.generation = 0
+        self.lock = asyncio.Lock()
+
+    async def _ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self.lock:
+            if self.loaded:
+                return
+            generation = self.generation
+            async with db_pool.reader() as conn:
+                cursor = await conn.execute("SELECT guild_id, server_name, host, password, api_port, rcon_port FROM servers")
+                rows = await cursor.fetchall()
+            servers = {}
+            by_guild = {}
+            for row in rows:
+                server = ServerConfig(*row)
+                servers[(server.guild_id, server.server_name)] = server
+                by_guild.setdefault(server.guild_id, []).append(server)
+            for key, old in self.servers.items():
+                if servers.get(key) != old:
+                    api_clients.discard(old.host, old.api_port, old.password)
+            self.servers = servers
+            self.by_guild = by_guild
+            # An invalidate() that raced with this read forces another load next time.
+            self.loaded = generation == self.generation
+
+    def invalidate(self):
+        self.generation += 1
+        self.loaded = False
+
+    async def all(self) -> List[ServerConfig]:
+        await self._ensure_loaded()
+        return list(self.servers.values())
+
+    async def get(self, guild_id: int, server_name: str) -> Optional[ServerConfig]:
+        await self._ensure_loaded()
+        return self.servers.get((guild_id, server_name))
+
+    async def for_guild(self, guild_id: int) -> List[ServerConfig]:
+        await self._ensure_loaded()
+        return list(self.by_guild.get(guild_id, []))
+
+    async def autocomplete(self, guild_id: int, current: str) -> List[str]:
+        current = (current or "").lower()
+        return [s.server_name for s in await self.for_guild(guild_id) if current in s.server_name.lower()]
+
+    def client(self, server: ServerConfig) -> PooledPalworldAPI:
+        return api_clients.client(server.host, server.api_port, server.password)
+
+    async def get_api(self, guild_id: int, server_name: str) -> Optional[PooledPalworldAPI]:
+        server = await self.get(guild_id, server_name)
+        return self.client(server) if server else None
+
+server_registry = ServerRegistry()
@@ -1,6 +1,14 @@
 import os
 from dotenv import load_dotenv
 from utils.database import initialize_db
+from utils.dbpool import db_pool
+from utils.apicache import api_cache
+from utils.apiclient import api_clients
+from utils.poller import server_poller
+from utils.sendqueue import send_queue
+from utils.sftpbackend import sftp_backend
+from utils.rconutility import rcon_pool
+from utils.delivery import delivery_worker
 
 load_dotenv("config/.env")
 bot_token = os.getenv('BOT_TOKEN', "No token found")
@@ -13,4 +21,17 @@ async def setup_hook(bot):
             if filename.endswith(".py"):
                 extension = os.path.join(root, filename).replace(os.sep, ".")[6:-3]
                 await bot.load_extension(extension)
-    await bot.tree.sync()
\ No newline at end of file
+    server_poller.start(bot)
+    delivery_worker.start(bot)
+    await bot.tree.sync()
+
+async def close_hook(close):
+    await close()
+    await server_poller.close()
+    await delivery_worker.close()
+    await send_queue.close()
+    await api_cache.close()
+    await api_clients.close()
+    await sftp_backend.close()
+    await rcon_pool.close()
+    await db_pool.close()
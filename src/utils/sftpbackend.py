@@ -0,0 +1,267 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
+from paramiko import SSHException
+from utils.sftppool import sftp_pool
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+FileAttrs = namedtuple("FileAttrs", ["filename", "st_size", "st_mtime", "st_mode"])
+
+PREFETCH_THRESHOLD = 32768
+BLOCK_SIZE = 65536
+MAX_REQUESTS = 64
+
+class ParamikoSFTP:
+    def __init__(self, backend: "ParamikoBackend", sftp):
+        self.backend = backend
+        self.sftp = sftp
+
+    async def _call(self, func, *args):
+        return await self.backend.run(func, *args)
+
+    async def listdir(self, path: str) -> List[str]:
+        return await self._call(self.sftp.listdir, path)
+
+    async def listdir_attr(self, path: str) -> List[FileAttrs]:
+        entries = await self._call(self.sftp.listdir_attr, path)
+        return [FileAttrs(e.filename, e.st_size, e.st_mtime, e.st_mode) for e in entries]
+
+    async def stat(self, path: str) -> FileAttrs:
+        attrs = await self._call(self.sftp.stat, path)
+        return FileAttrs(path.rsplit("/", 1)[-1], attrs.st_size, attrs.st_mtime, attrs.st_mode)
+
+    def _read(self, path: str, start: int, end: int) -> bytes:
+        with self.sftp.open(path, "rb") as f:
+            f.seek(start)
+            if end - start > PREFETCH_THRESHOLD:
+                f.prefetch(end)
+            return f.read(end - start)
+
+    async def read(self, path: str, start: int, end: int) -> bytes:
+        return await self._call(self._read, path, start, end)
+
+    async def get(self, remote_path: str, local_path: str):
+        await self._call(functools.partial(self.sftp.get, remote_path, local_path, max_concurrent_prefetch_requests=MAX_REQUESTS))
+
+    async def iter_chunks(self, path: str, chunk_size: int = 1024 * 1024):
+        f = await self._call(self.sftp.open, path, "rb")
+        try:
+            await self._call(functools.partial(f.prefetch, max_concurrent_requests=MAX_REQUESTS))
+            while True:
+                chunk = await self._call(f.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            await self._call(f.close)
+
+class ParamikoBackend:
+    name = "paramiko"
+
+    def __init__(self, max_workers: int = 8):
+        # A dedicated executor keeps slow SFTP hosts from starving other to_thread users.
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sftp")
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args))
+
+    @asynccontextmanager
+    async def client(self, cfg: dict):
+        session = await self.run(sftp_pool.session, cfg)
+        sftp = await self.run(session.checkout)
+        broken = False
+        try:
+            yield ParamikoSFTP(self, sftp)
+        except (SSHException, EOFError, ConnectionError):
+            broken = True
+            raise
+        finally:
+            await self.run(session.checkin, sftp, broken)
+
+    async def close(self):
+        await self.run(sftp_pool.close)
+        self.executor.shutdown(wait=False)
+
+class AsyncSSHSFTP:
+    def __init__(self, sftp):
+        self.sftp = sftp
+
+    def _attrs(self, filename: str, attrs) -> FileAttrs:
+        return FileAttrs(filename, attrs.size, attrs.mtime, attrs.permissions)
+
+    async def listdir(self, path: str) -> List[str]:
+        return [name for name in await self.sftp.listdir(path) if name not in (".", "..")]
+
+    async def listdir_attr(self, path: str) -> List[FileAttrs]:
+        return [self._attrs(e.filename, e.attrs) for e in await self.sftp.readdir(path) if e.filename not in (".", "..")]
+
+    async def stat(self, path: str) -> FileAttrs:
+        try:
+            return self._attrs(path.rsplit("/", 1)[-1], await self.sftp.stat(path))
+        except asyncssh.SFTPNoSuchFile as e:
+            raise FileNotFoundError(str(e)) from e
+
+    async def read(self, path: str, start: int, end: int) -> bytes:
+        try:
+            async with self.sftp.open(path, "rb") as f:
+                return await f.read(end - start, start)
+        except asyncssh.SFTPNoSuchFile as e:
+            raise FileNotFoundError(str(e)) from e
+
+    async def get(self, remote_path: str, local_path: str):
+        await self.sftp.get(remote_path, local_path, block_size=BLOCK_SIZE, max_requests=MAX_REQUESTS)
+
+    async def iter_chunks(self, path: str, chunk_size: int = 1024 * 1024):
+        async with self.sftp.open(path, "rb", block_size=BLOCK_SIZE, max_requests=MAX_REQUESTS) as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+class AsyncSSHSession:
+    def __init__(self, cfg: dict, keepalive: int, connect_timeout: int, base_backoff: int, max_backoff: int):
+        self.name = cfg.get("name", cfg["host"])
+        self.host = cfg["host"]
+        self.port = int(cfg.get("port", 2022))
+        self.username = cfg["username"]
+        self.password = cfg["password"]
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.conn = None
+        self.sftp = None
+        self.closed = True
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.failures = 0
+        self.retry_at = 0.0
+        self.lock = asyncio.Lock()
+
+    def _on_closed(self, conn):
+        if conn is self.conn:
+            self.closed = True
+
+    async def _connect(self):
+        now = time.monotonic()
+        if now < self.retry_at:
+            raise ConnectionError(f"[{self.name}] SFTP reconnect backing off for {self.retry_at - now:.0f}s")
+        await self._drop()
+        opened = []
+
+        async def open_session():
+            conn = await asyncssh.connect(
+                self.host,
+                port=self.port,
+                username=self.username,
+                password=self.password,
+                known_hosts=None,
+                keepalive_interval=self.keepalive,
+            )
+            opened.append(conn)
+            return conn, await conn.start_sftp_client()
+
+        try:
+            # The subsystem request shares the connect timeout, since callers for this host wait on the lock meanwhile.
+            conn, sftp = await asyncio.wait_for(open_session(), self.connect_timeout)
+        except BaseException as e:
+            for conn in opened:
+                conn.close()
+            if isinstance(e, Exception):
+                self.failures += 1
+                self.retry_at = time.monotonic() + min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+            raise
+        self.conn, self.sftp, self.closed = conn, sftp, False
+        watcher = asyncio.ensure_future(conn.wait_closed())
+        watcher.add_done_callback(lambda _: self._on_closed(conn))
+        self.failures = 0
+        self.retry_at = 0.0
+
+    async def _drop(self):
+        conn, self.conn, self.sftp, self.closed = self.conn, None, None, True
+        if conn is not None:
+            conn.close()
+            try:
+                await conn.wait_closed()
+            except Exception:
+                pass
+
+    async def checkout(self):
+        async with self.lock:
+            if self.closed:
+                await self._connect()
+            self.in_use += 1
+            self.last_used = time.monotonic()
+            return self.sftp
+
+    async def checkin(self, broken: bool = False):
+        self.in_use -= 1
+        self.last_used = time.monotonic()
+        if broken:
+            self.closed = True
+
+    async def close_if_idle(self, idle_timeout: int) -> bool:
+        if self.in_use == 0 and not self.closed and time.monotonic() - self.last_used > idle_timeout:
+            async with self.lock:
+                await self._drop()
+            return True
+        return False
+
+    async def close(self):
+        async with self.lock:
+            await self._drop()
+
+class AsyncSSHBackend:
+    name = "asyncssh"
+
+    def __init__(self, keepalive: int = 30, idle_timeout: int = 300, connect_timeout: int = 15, base_backoff: int = 5, max_backoff: int = 300):
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.sessions: Dict[Tuple[str, int, str], AsyncSSHSession] = {}
+
+    async def session(self, cfg: dict) -> AsyncSSHSession:
+        key = (cfg["host"], int(cfg.get("port", 2022)), cfg["username"])
+        session = self.sessions.get(key)
+        if session is None or session.password != cfg["password"]:
+            if session:
+                await session.close()
+            session = AsyncSSHSession(cfg, self.keepalive, self.connect_timeout, self.base_backoff, self.max_backoff)
+            self.sessions[key] = session
+        for other in list(self.sessions.values()):
+            if other is not session and await other.close_if_idle(self.idle_timeout):
+                logging.info(f"[{other.name}] closed idle SFTP session")
+        return session
+
+    @asynccontextmanager
+    async def client(self, cfg: dict):
+        session = await self.session(cfg)
+        sftp = await session.checkout()
+        broken = False
+        try:
+            # One asyncssh SFTP client pipelines concurrent requests, so every caller shares it.
+            yield AsyncSSHSFTP(sftp)
+        except (asyncssh.DisconnectError, asyncssh.ChannelOpenError, ConnectionError):
+            broken = True
+            raise
+        finally:
+            await session.checkin(broken)
+
+    async def close(self):
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+sftp_backend = AsyncSSHBackend() if asyncssh else ParamikoBackend()
@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from paramiko import SSHClient, AutoAddPolicy, SFTPClient, SSHException
+
+class SFTPSession:
+    def __init__(self, cfg: dict, keepalive: int, connect_timeout: int, base_backoff: int, max_backoff: int):
+        self.name = cfg.get("name", cfg["host"])
+        self.host = cfg["host"]
+        self.port = int(cfg.get("port", 2022))
+        self.username = cfg["username"]
+        self.password = cfg["password"]
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.ssh: Optional[SSHClient] = None
+        self.idle: List[SFTPClient] = []
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self.failures = 0
+        self.retry_at = 0.0
+        self.lock = threading.Lock()
+
+    def _alive(self) -> bool:
+        transport = self.ssh.get_transport() if self.ssh else None
+        return transport is not None and transport.is_active()
+
+    def _connect(self):
+        now = time.monotonic()
+        if now < self.retry_at:
+            raise ConnectionError(f"[{self.name}] SFTP reconnect backing off for {self.retry_at - now:.0f}s")
+        self._drop()
+        ssh = SSHClient()
+        ssh.set_missing_host_key_policy(AutoAddPolicy())
+        try:
+            ssh.connect(
+                hostname=self.host,
+                username=self.username,
+                password=self.password,
+                port=self.port,
+                timeout=self.connect_timeout,
+            )
+        except Exception:
+            ssh.close()
+            self.failures += 1
+            self.retry_at = time.monotonic() + min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+            raise
+        ssh.get_transport().set_keepalive(self.keepalive)
+        self.ssh = ssh
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def _drop(self):
+        for sftp in self.idle:
+            try:
+                sftp.close()
+            except Exception:
+                pass
+        self.idle = []
+        if self.ssh:
+            try:
+                self.ssh.close()
+            except Exception:
+                pass
+        self.ssh = None
+
+    def checkout(self) -> SFTPClient:
+        with self.lock:
+            if not self._alive():
+                self._connect()
+            self.in_use += 1
+            self.last_used = time.monotonic()
+            if self.idle:
+                return self.idle.pop()
+        try:
+            # Opening a channel on the authenticated transport skips the TCP, key exchange and auth round trips.
+            return self.ssh.open_sftp()
+        except Exception:
+            with self.lock:
+                self.in_use -= 1
+            raise
+
+    def checkin(self, sftp: SFTPClient, broken: bool = False):
+        with self.lock:
+            self.in_use -= 1
+            self.last_used = time.monotonic()
+            if broken or not self._alive():
+                try:
+                    sftp.close()
+                except Exception:
+                    pass
+                if not self._alive() and self.in_use == 0:
+                    self._drop()
+                return
+            try:
+                sftp.chdir(None)
+            except Exception:
+                pass
+            self.idle.append(sftp)
+
+    def close_if_idle(self, idle_timeout: int) -> bool:
+        with self.lock:
+            if self.in_use == 0 and self.ssh and time.monotonic() - self.last_used > idle_timeout:
+                self._drop()
+                return True
+            return False
+
+    def close(self):
+        with self.lock:
+            self._drop()
+
+class SFTPPool:
+    def __init__(self, keepalive: int = 30, idle_timeout: int = 300, connect_timeout: int = 15, base_backoff: int = 5, max_backoff: int = 300):
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.sessions: Dict[Tuple[str, int, str], SFTPSession] = {}
+        self.lock = threading.Lock()
+
+    def session(self, cfg: dict) -> SFTPSession:
+        key = (cfg["host"], int(cfg.get("port", 2022)), cfg["username"])
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None or session.password != cfg["password"]:
+                if session:
+                    session.close()
+                session = SFTPSession(cfg, self.keepalive, self.connect_timeout, self.base_backoff, self.max_backoff)
+                self.sessions[key] = session
+            sessions = list(self.sessions.values())
+        for other in sessions:
+            if other is not session and other.close_if_idle(self.idle_timeout):
+                logging.info(f"[{other.name}] closed idle SFTP session")
+        return session
+
+    @contextmanager
+    def sftp(self, cfg: dict):
+        session = self.session(cfg)
+        sftp = session.checkout()
+        broken = False
+        try:
+            yield sftp
+        except (SSHException, EOFError, ConnectionError):
+            broken = True
+            raise
+        finally:
+            session.checkin(sftp, broken)
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+sftp_pool = SFTPPool()
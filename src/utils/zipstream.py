@@ -0,0 +1,109 @@
+import asyncio
+import concurrent.futures
+import os
+import time
+import zipfile
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
+
+COMPRESSION = {
+    "deflate": zipfile.ZIP_DEFLATED,
+    "lzma": zipfile.ZIP_LZMA,
+    "store": zipfile.ZIP_STORED,
+}
+
+ZIP_EPOCH = 315619200
+
+class ZipStreamAborted(Exception):
+    pass
+
+class ZipStreamWriter:
+    def __init__(self, path: str, compression: str = "deflate", level: Optional[int] = None, queue_size: int = 8):
+        if compression not in COMPRESSION:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSION)}")
+        self.path = path
+        self.compression = COMPRESSION[compression]
+        # zipfile ignores compresslevel for lzma and store.
+        self.level = level
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.aborted = False
+        self.bytes_in = 0
+        self.task = asyncio.ensure_future(asyncio.to_thread(self._run))
+
+    def _get(self):
+        future = asyncio.run_coroutine_threadsafe(self.queue.get(), self.loop)
+        while True:
+            try:
+                return future.result(timeout=1)
+            except concurrent.futures.TimeoutError:
+                if self.aborted or self.loop.is_closed():
+                    future.cancel()
+                    raise ZipStreamAborted()
+
+    def _run(self):
+        archive = zipfile.ZipFile(self.path, "w", self.compression, compresslevel=self.level, allowZip64=True)
+        entry = None
+        try:
+            while True:
+                item = self._get()
+                if item is None:
+                    break
+                kind, value = item
+                if kind == "open":
+                    arcname, mtime, size = value
+                    info = zipfile.ZipInfo(arcname, time.localtime(max(mtime or time.time(), ZIP_EPOCH))[:6])
+                    info.compress_type = self.compression
+                    info._compresslevel = self.level
+                    # A known size lets zipfile decide on zip64 itself instead of forcing it for every entry.
+                    info.file_size = size or 0
+                    entry = archive.open(info, "w", force_zip64=size is None)
+                elif kind == "data":
+                    entry.write(value)
+                elif kind == "close":
+                    entry.close()
+                    entry = None
+                elif kind == "file":
+                    path, arcname = value
+                    archive.write(path, arcname)
+            archive.close()
+        except BaseException:
+            for handle in (entry, archive):
+                try:
+                    if handle:
+                        handle.close()
+                except Exception:
+                    pass
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            raise
+
+    async def _put(self, item):
+        put = asyncio.ensure_future(self.queue.put(item))
+        done, _ = await asyncio.wait({put, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        if put not in done:
+            put.cancel()
+            await self.task
+            raise ZipStreamAborted("Archive writer stopped unexpectedly")
+
+    async def add_stream(self, arcname: str, chunks: AsyncIterator[bytes], mtime: Optional[float] = None, size: Optional[int] = None):
+        await self._put(("open", (arcname, mtime, size)))
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                self.bytes_in += len(chunk)
+                await self._put(("data", chunk))
+        await self._put(("close", None))
+
+    async def add_file(self, path: str, arcname: str):
+        self.bytes_in += os.path.getsize(path)
+        await self._put(("file", (path, arcname)))
+
+    async def close(self):
+        await self._put(None)
+        await self.task
+
+    async def abort(self):
+        self.aborted = True
+        await asyncio.gather(self.task, return_exceptions=True)